@@ -1,6 +1,7 @@
 import { TouchableOpacity, View, Text, StyleSheet } from "react-native";
+import { STRESS_COLORS } from "../utils/heatmapUtils";
 
-export default function CalendarDay({ day, onPress, hasEvents, isToday, eventCount }) {
+export default function CalendarDay({ day, onPress, hasEvents, isToday, eventCount, stressLevel }) {
   return (
     <TouchableOpacity
       onPress={onPress}
@@ -11,6 +12,7 @@ export default function CalendarDay({ day, onPress, hasEvents, isToday, eventCou
         styles.dayCircle,
         isToday && styles.todayCircle,
         hasEvents && !isToday && styles.hasEventsCircle,
+        stressLevel && { backgroundColor: STRESS_COLORS[stressLevel] },
       ]}>
         <Text style={[
           styles.dayText,
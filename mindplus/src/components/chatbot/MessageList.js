@@ -53,11 +53,17 @@ export default function MessageList({ messages, onSelectTechnique }) {
               >
                 {msg.label}
               </Text>
-              <Text
-                style={[styles.messageText, isUser && { color: "#FFFFFF" }]}
-              >
-                {msg.text}
-              </Text>
+              {msg.text ? (
+                <Text
+                  style={[styles.messageText, isUser && { color: "#FFFFFF" }]}
+                >
+                  {msg.text}
+                </Text>
+              ) : null}
+
+              {msg.streaming && (
+                <Text style={styles.metaText}>MindPlus is typing…</Text>
+              )}
 
               {msg.from === "bot" && msg.meta && (
                 <View style={styles.metaContainer}>
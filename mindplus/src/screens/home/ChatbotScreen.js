@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   View,
   Text,
@@ -8,7 +8,11 @@ import {
 } from "react-native";
 import { SafeAreaView } from "react-native-safe-area-context";
 import { auth } from "../../firebase/firebaseConfig";
-import { startChatSession, sendChatMessage } from "../../services/chatApi";
+import {
+  createChatStream,
+  startChatSession,
+  sendChatMessage,
+} from "../../services/chatApi";
 import ChatHeader from "../../components/chatbot/ChatHeader";
 import ChatStatusCard from "../../components/chatbot/ChatStatusCard";
 import MessageList from "../../components/chatbot/MessageList";
@@ -43,6 +47,17 @@ function formatOverallStatus(status) {
   }
 }
 
+function toMeta(raw) {
+  return {
+    emotion: raw.emotion,
+    stressLevel: raw.stress_level,
+    academicStressCategory: raw.academic_stress_category,
+    riskLevel: raw.risk_level,
+    overallStatus: raw.overall_status,
+    techniques: raw.techniques || [],
+  };
+}
+
 function formatEmotion(emotion) {
   if (!emotion) return "Emotion: pending";
   return `Emotion: ${emotion}`;
@@ -77,11 +92,13 @@ export default function ChatbotScreen({ navigation }) {
   const [input, setInput] = useState("");
   const [messages, setMessages] = useState([]);
   const [selectedTechnique, setSelectedTechnique] = useState(null);
+  const chatStream = useRef(null);
 
   useEffect(() => {
     const init = async () => {
       try {
         const id = await startChatSession();
+        chatStream.current = createChatStream(id);
         setSessionId(id);
       } catch (err) {
         console.log("Failed to start chatbot session", err);
@@ -90,8 +107,14 @@ export default function ChatbotScreen({ navigation }) {
       }
     };
     init();
+    return () => chatStream.current?.close();
   }, []);
 
+  const updateMessage = (id, update) =>
+    setMessages((prev) =>
+      prev.map((m) => (m.id === id ? { ...m, ...update(m) } : m))
+    );
+
   const handleSend = async () => {
     if (!sessionId || !input.trim() || sending) return;
     const text = input.trim();
@@ -108,37 +131,45 @@ export default function ChatbotScreen({ navigation }) {
     };
     setMessages((prev) => [...prev, userMessage]);
 
+    // The reply is streamed into one bot message: the status meta shows up
+    // as soon as the message is classified and the text grows part by part.
+    const botId = `${Date.now()}-bot`;
+    setMessages((prev) => [
+      ...prev,
+      { id: botId, from: "bot", text: "", label: "MindPlus Bot", streaming: true },
+    ]);
+
     try {
       setSending(true);
-      const raw = await sendChatMessage(sessionId, text);
-      const reply = {
-        botMessage: raw.bot_message,
-        emotion: raw.emotion,
-        stressLevel: raw.stress_level,
-        academicStressCategory: raw.academic_stress_category,
-        riskLevel: raw.risk_level,
-        overallStatus: raw.overall_status,
-        techniques: raw.techniques || [],
-      };
-      const botMessage = {
-        id: `${Date.now()}-bot`,
-        from: "bot",
-        text: reply.botMessage,
-        label: "MindPlus Bot",
-        meta: {
-          emotion: reply.emotion,
-          stressLevel: reply.stressLevel,
-          academicStressCategory: reply.academicStressCategory,
-          riskLevel: reply.riskLevel,
-          overallStatus: reply.overallStatus,
-          techniques: reply.techniques,
-        },
-      };
-      setMessages((prev) => [...prev, botMessage]);
+      let raw;
+      try {
+        raw = await chatStream.current.send(text, {
+          onClassification: (data) =>
+            updateMessage(botId, () => ({ meta: toMeta(data) })),
+          onReply: (part) =>
+            updateMessage(botId, (m) => ({
+              text: m.text + part.text,
+              meta: part.techniques
+                ? { ...m.meta, techniques: part.techniques }
+                : m.meta,
+            })),
+        });
+      } catch (streamErr) {
+        // The turn is only recorded once the whole reply was built, so a
+        // failed stream can be retried as a plain request.
+        console.log("Chat stream failed, retrying without streaming", streamErr);
+        updateMessage(botId, () => ({ text: "", meta: undefined }));
+        raw = await sendChatMessage(sessionId, text);
+      }
+      updateMessage(botId, () => ({
+        text: raw.bot_message,
+        meta: toMeta(raw),
+        streaming: false,
+      }));
     } catch (err) {
       console.log("Failed to send chatbot message", err);
       setMessages((prev) => [
-        ...prev,
+        ...prev.filter((m) => m.id !== botId),
         {
           id: `${Date.now()}-error`,
           from: "bot",
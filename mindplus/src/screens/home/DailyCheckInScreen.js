@@ -13,7 +13,7 @@ import { useNavigation } from "@react-navigation/native";
 import { auth, db } from "../../firebase/firebaseConfig";
 import { doc, getDoc, setDoc } from "firebase/firestore";
 
-import { detectEmotion } from "../../services/api";
+import { detectEmotionBatch, recordHeatmapCheckIns } from "../../services/api";
 
 const QUESTION_BLUEPRINTS = [
   {
@@ -155,38 +155,47 @@ export default function DailyCheckInScreen() {
     }
     setSubmitting(true);
     try {
-      const enrichedAnswers = await Promise.all(
-        questions.map(async (question) => {
-          const responseText = responses[question.id].trim();
-          try {
-            const prediction = await detectEmotion(responseText);
-            return {
-              questionId: question.id,
-              question: question.prompt,
-              response: responseText,
-              emotion: prediction.emotion,
-              confidence: prediction.confidence,
-              keywords: prediction.keywords,
-            };
-          } catch (error) {
-            console.warn("Emotion detection failed, storing as unknown", error);
-            return {
-              questionId: question.id,
-              question: question.prompt,
-              response: responseText,
-              emotion: "unknown",
-              confidence: 0,
-              keywords: [],
-            };
-          }
-        })
+      const responseTexts = questions.map((question) =>
+        responses[question.id].trim()
       );
+      let predictions = [];
+      let summary = null;
+      try {
+        const batch = await detectEmotionBatch(responseTexts);
+        predictions = batch.items;
+        summary = { emotion: batch.emotion, confidence: batch.confidence };
+      } catch (error) {
+        console.warn("Emotion detection failed, storing as unknown", error);
+      }
+      const enrichedAnswers = questions.map((question, index) => {
+        const prediction = predictions[index];
+        return {
+          questionId: question.id,
+          question: question.prompt,
+          response: responseTexts[index],
+          emotion: prediction?.emotion ?? "unknown",
+          confidence: prediction?.confidence ?? 0,
+          keywords: prediction?.keywords ?? [],
+        };
+      });
       const checkInRef = doc(db, "users", user.uid, "dailyCheckIns", todayKey);
       await setDoc(checkInRef, {
         answers: enrichedAnswers,
         timestamp: new Date().toISOString(),
         date: todayKey,
       });
+      // One check-in per day, keyed by the date like the Firestore doc,
+      // so resubmitting today replaces it in the heatmap rollup. An
+      // unclassified check-in is still reported (as "unknown") so the
+      // rollup's count matches Firestore.
+      await recordHeatmapCheckIns([
+        {
+          checkin_id: todayKey,
+          date: todayKey,
+          emotion: summary?.emotion ?? "unknown",
+          confidence: summary?.confidence ?? 0,
+        },
+      ]);
       setExistingRecord({
         answers: enrichedAnswers,
         timestamp: new Date().toISOString(),
@@ -2,21 +2,70 @@ import { View, Text, ScrollView, TouchableOpacity, StyleSheet, ActivityIndicator
 import { useState, useEffect } from "react";
 import CalendarDay from "../../components/CalanderDay";
 import DayDetailModal from "../../components/DayDetailModal";
-import { getDaysInMonth } from "../../utils/heatmapUtils";
+import { getDaysInMonth, getStressLevel } from "../../utils/heatmapUtils";
 import { auth, db } from "../../firebase/firebaseConfig";
-import { collection, addDoc, query, getDocs, doc, updateDoc, deleteDoc } from "firebase/firestore";
+import { collection, addDoc, query, where, getDocs, doc, updateDoc, deleteDoc } from "firebase/firestore";
+import {
+  deleteHeatmapEvent,
+  fetchHeatmapMonth,
+  recordHeatmapEvents,
+  syncHeatmapHistory,
+} from "../../services/api";
 
 const saveEvent = async (event) => {
   const user = auth.currentUser;
   if (!user) return;
 
-  await addDoc(
+  const ref = await addDoc(
     collection(db, "users", user.uid, "calendarEvents"),
     {
       ...event,
       createdAt: Date.now(),
     }
   );
+  await recordHeatmapEvents([{ event_id: ref.id, date: event.date }]);
+};
+
+// Firestore "in" filters take at most 30 values.
+const IN_FILTER_LIMIT = 30;
+
+// Day summaries for a month straight from Firestore, used when the backend
+// rollups cannot be read. Only events are counted, as before the rollups.
+const fetchMonthFromFirestore = async (uid, year, month) => {
+  const dateKeys = [...Array(getDaysInMonth(year, month))].map(
+    (_, index) => `${year}-${month + 1}-${index + 1}`
+  );
+  const chunks = [];
+  for (let i = 0; i < dateKeys.length; i += IN_FILTER_LIMIT) {
+    chunks.push(dateKeys.slice(i, i + IN_FILTER_LIMIT));
+  }
+  const snapshots = await Promise.all(
+    chunks.map((chunk) =>
+      getDocs(
+        query(
+          collection(db, "users", uid, "calendarEvents"),
+          where("date", "in", chunk)
+        )
+      )
+    )
+  );
+
+  const counts = {};
+  snapshots.forEach((snapshot) =>
+    snapshot.forEach((eventDoc) => {
+      const { date } = eventDoc.data();
+      counts[date] = (counts[date] || 0) + 1;
+    })
+  );
+
+  const summaries = {};
+  Object.entries(counts).forEach(([date, eventCount]) => {
+    summaries[date] = {
+      event_count: eventCount,
+      stress_level: getStressLevel(0, eventCount),
+    };
+  });
+  return summaries;
 };
 
 export default function HeatmapScreen({ navigation }) {
@@ -24,6 +73,7 @@ export default function HeatmapScreen({ navigation }) {
   const [selectedDate, setSelectedDate] = useState(null);
   const [modalVisible, setModalVisible] = useState(false);
   const [eventsByDate, setEventsByDate] = useState({});
+  const [daySummaries, setDaySummaries] = useState({});
   const [loadingEvents, setLoadingEvents] = useState(false);
 
   const year = currentDate.getFullYear();
@@ -55,6 +105,7 @@ export default function HeatmapScreen({ navigation }) {
     const dateString = `${year}-${month + 1}-${day}`;
     setSelectedDate(dateString);
     setModalVisible(true);
+    fetchEventsForDay(dateString);
   };
 
   const handleAddEvent = (event) => {
@@ -74,6 +125,10 @@ export default function HeatmapScreen({ navigation }) {
   const startOffset = firstDayOfMonth === 0 ? 6 : firstDayOfMonth - 1;
   const formatDateKey = (y, m, d) => `${y}-${m + 1}-${d}`;
 
+  // Per-day counts and stress come from the backend rollups (one small
+  // read per month), re-synced first if they have fallen behind Firestore;
+  // the events themselves are only loaded for the day that is open. When
+  // the backend cannot be used the month is counted from Firestore.
   const fetchEventsForMonth = async () => {
     const user = auth.currentUser;
     if (!user) return;
@@ -81,29 +136,53 @@ export default function HeatmapScreen({ navigation }) {
     setLoadingEvents(true);
 
     try {
-      const snapshot = await getDocs(
-        collection(db, "users", user.uid, "calendarEvents")
-      );
+      let summary = await fetchHeatmapMonth(year, month + 1);
+      if (await syncHeatmapHistory(summary.totals)) {
+        summary = await fetchHeatmapMonth(year, month + 1);
+      }
+
+      const summaries = {};
+      summary.days.forEach((day) => {
+        const [y, m, d] = day.date.split("-").map(Number);
+        summaries[formatDateKey(y, m - 1, d)] = day;
+      });
+
+      setDaySummaries(summaries);
+    } catch (err) {
+      console.warn("Heatmap rollups unavailable, reading Firestore:", err);
+      try {
+        setDaySummaries(await fetchMonthFromFirestore(user.uid, year, month));
+      } catch (firestoreErr) {
+        console.error("Error fetching events:", firestoreErr);
+      }
+    }
 
-      const grouped = {};
+    setLoadingEvents(false);
+  };
 
-      snapshot.forEach((doc) => {
-        const event = doc.data();
-        const [y, m, d] = event.date.split("-").map(Number);
+  const fetchEventsForDay = async (dateString) => {
+    const user = auth.currentUser;
+    if (!user) return;
 
-        if (y === year && m === month + 1) {
-          const key = `${y}-${m}-${d}`;
-          if (!grouped[key]) grouped[key] = [];
-          grouped[key].push({ id: doc.id, ...event });
-        }
-      });
+    try {
+      const snapshot = await getDocs(
+        query(
+          collection(db, "users", user.uid, "calendarEvents"),
+          where("date", "==", dateString)
+        )
+      );
 
-      setEventsByDate(grouped);
+      const events = [];
+      snapshot.forEach((doc) => events.push({ id: doc.id, ...doc.data() }));
+      setEventsByDate((prev) => ({ ...prev, [dateString]: events }));
     } catch (err) {
       console.error("Error fetching events:", err);
     }
+  };
 
-    setLoadingEvents(false);
+  const refreshAfterChange = () => {
+    fetchEventsForMonth();
+    if (selectedDate) fetchEventsForDay(selectedDate);
   };
 
   useEffect(() => {
@@ -118,6 +197,9 @@ export default function HeatmapScreen({ navigation }) {
       doc(db, "users", user.uid, "calendarEvents", eventId),
       updatedData
     );
+    if (updatedData.date) {
+      await recordHeatmapEvents([{ event_id: eventId, date: updatedData.date }]);
+    }
   };
 
   const deleteEvent = async (eventId) => {
@@ -127,6 +209,7 @@ export default function HeatmapScreen({ navigation }) {
     await deleteDoc(
       doc(db, "users", user.uid, "calendarEvents", eventId)
     );
+    await deleteHeatmapEvent(eventId);
   };
 
   return (
@@ -203,8 +286,9 @@ export default function HeatmapScreen({ navigation }) {
             {[...Array(daysInMonth)].map((_, index) => {
               const day = index + 1;
               const dateKey = `${year}-${month + 1}-${day}`;
-              const hasEvents = (eventsByDate[dateKey] || []).length > 0;
-              const eventCount = (eventsByDate[dateKey] || []).length;
+              const eventCount = daySummaries[dateKey]?.event_count ?? 0;
+              const stressLevel = daySummaries[dateKey]?.stress_level;
+              const hasEvents = eventCount > 0;
 
               return (
                 <CalendarDay
@@ -212,6 +296,7 @@ export default function HeatmapScreen({ navigation }) {
                   day={day}
                   hasEvents={hasEvents}
                   eventCount={eventCount}
+                  stressLevel={stressLevel}
                   isToday={isToday(day)}
                   onPress={() => openDay(day)}
                 />
@@ -227,15 +312,15 @@ export default function HeatmapScreen({ navigation }) {
         events={eventsByDate[selectedDate] || []}
         onAddEvent={async (event) => {
           await saveEvent(event);
-          fetchEventsForMonth();
+          refreshAfterChange();
         }}
         onUpdateEvent={async (id, data) => {
           await updateEvent(id, data);
-          fetchEventsForMonth();
+          refreshAfterChange();
         }}
         onDeleteEvent={async (id) => {
           await deleteEvent(id);
-          fetchEventsForMonth();
+          refreshAfterChange();
         }}
         onClose={() => setModalVisible(false)}
       />
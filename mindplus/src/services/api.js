@@ -1,7 +1,16 @@
-import { addDoc, collection, getDocs, limit, query, serverTimestamp, where } from 'firebase/firestore';
+import {
+  addDoc,
+  collection,
+  getCountFromServer,
+  getDocs,
+  limit,
+  query,
+  serverTimestamp,
+  where,
+} from 'firebase/firestore';
 import { Platform } from 'react-native';
 
-import { db } from '../firebase/firebaseConfig';
+import { auth, db } from '../firebase/firebaseConfig';
 
 const DAILY_CHECK_INS_COLLECTION = 'dailyCheckIns';
 
@@ -94,22 +103,111 @@ export async function detectEmotion(text) {
   };
 }
 
-export async function fetchCopingStrategy(emotion, confidence) {
+export async function detectEmotionBatch(texts) {
   const baseUrl = ensureEmotionServiceUrl();
-  const payload = { emotion, confidence };
-  const response = await fetch(`${baseUrl}/emotion/coping-strategy`, {
+  const payload = { texts };
+  const response = await fetch(`${baseUrl}/emotion/predict/batch`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(payload),
   });
   if (!response.ok) {
-    throw new Error(`Coping strategy service error: ${response.status}`);
+    throw new Error(`Emotion service error: ${response.status}`);
   }
   const data = await response.json();
+  const items = Array.isArray(data.items) ? data.items : [];
+  return {
+    items: items.map((item) => ({
+      emotion: item.emotion ?? 'unknown',
+      confidence: item.confidence ?? 0,
+      keywords: item.keywords ?? [],
+      model: item.model,
+    })),
+    emotion: data.emotion ?? 'unknown',
+    confidence: Number.isFinite(data.confidence) ? data.confidence : 0,
+  };
+}
+
+// Streams a voice check-in to /voice/stream while it is being recorded.
+// Call send() with ArrayBuffers of 16-bit mono PCM as they arrive and
+// finish() when recording stops; finish() resolves with the final
+// analysis (transcript, stress_level, emotion, risk_level).
+export function openVoiceStream({ nickname = '', sampleRate = 16000, onPartial } = {}) {
+  const baseUrl = ensureEmotionServiceUrl().replace(/^http/, 'ws');
+  const socket = new WebSocket(
+    `${baseUrl}/voice/stream?nickname=${encodeURIComponent(nickname)}&sample_rate=${sampleRate}`
+  );
+  socket.binaryType = 'arraybuffer';
+  const queued = [];
+  let settle;
+  const result = new Promise((resolve, reject) => {
+    settle = { resolve, reject };
+  });
+
+  socket.onopen = () => {
+    queued.splice(0).forEach((message) => socket.send(message));
+  };
+  socket.onmessage = (message) => {
+    const { event, data } = JSON.parse(message.data);
+    if (event === 'partial' && onPartial) onPartial(data);
+    if (event === 'final') settle.resolve(data);
+    if (event === 'error') settle.reject(new Error(`Voice stream error: ${data.status} ${data.detail}`));
+  };
+  socket.onerror = () => settle.reject(new Error('Voice stream connection failed'));
+  socket.onclose = () => settle.reject(new Error('Voice stream closed before the final result'));
+
+  const send = (message) => {
+    if (socket.readyState === WebSocket.OPEN) socket.send(message);
+    else queued.push(message);
+  };
+  return {
+    send,
+    finish() {
+      send(JSON.stringify({ event: 'end' }));
+      return result;
+    },
+    cancel() {
+      socket.close();
+    },
+  };
+}
+
+// Mirrors pick_severity in ml-backend/services/emotion_service.py so the
+// request URL only depends on (emotion, severity) and can be cached.
+function pickSeverity(confidence) {
+  if (confidence >= 0.75) return 'high';
+  if (confidence >= 0.4) return 'medium';
+  return 'low';
+}
+
+// url -> { etag, data }; revalidated with If-None-Match on every call.
+const copingStrategyCache = new Map();
+
+export async function fetchCopingStrategy(emotion, confidence) {
+  const baseUrl = ensureEmotionServiceUrl();
+  const safeConfidence = Number.isFinite(confidence) ? Math.min(1, Math.max(0, confidence)) : 0;
+  const severity = pickSeverity(safeConfidence);
+  const params = `emotion=${encodeURIComponent(emotion || 'neutral')}&severity=${severity}`;
+  const url = `${baseUrl}/emotion/coping-strategy?${params}`;
+  const cached = copingStrategyCache.get(url);
+
+  const response = await fetch(url, {
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+  });
+  let data;
+  if (response.status === 304 && cached) {
+    data = cached.data;
+  } else if (response.ok) {
+    data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) copingStrategyCache.set(url, { etag, data });
+  } else {
+    throw new Error(`Coping strategy service error: ${response.status}`);
+  }
   return {
     emotion: data.emotion ?? emotion,
-    confidence: Number.isFinite(data.confidence) ? data.confidence : confidence,
-    severity: data.severity ?? 'low',
+    confidence: safeConfidence,
+    severity: data.severity ?? severity,
     strategy: data.strategy ?? null,
   };
 }
@@ -149,3 +247,113 @@ export async function getDailyCheckInForDate(userId, dateKey) {
     submittedAt,
   };
 }
+
+// The backend keeps per-day heatmap rollups (event counts, check-in
+// confidence, dominant emotion) that are updated as events and check-ins
+// are written. Reporting a write is best effort: Firestore stays the
+// source of truth and a failed update is only logged. A write that got
+// lost is caught the next time the heatmap opens (see syncHeatmapHistory).
+//
+// The rollups belong to the signed-in user: every request carries their
+// Firebase ID token and the backend takes the user id from it.
+async function heatmapRequest(path, { method = 'GET', body } = {}) {
+  const user = auth.currentUser;
+  if (!user) {
+    throw new Error('Not signed in');
+  }
+  const baseUrl = ensureEmotionServiceUrl();
+  const headers = { Authorization: `Bearer ${await user.getIdToken()}` };
+  if (body !== undefined) {
+    headers['Content-Type'] = 'application/json';
+  }
+  const response = await fetch(`${baseUrl}${path}`, {
+    method,
+    headers,
+    body: body === undefined ? undefined : JSON.stringify(body),
+  });
+  if (!response.ok) {
+    throw new Error(`Heatmap service error: ${response.status}`);
+  }
+  return response.json();
+}
+
+async function reportHeatmapWrite(path, options) {
+  try {
+    await heatmapRequest(path, options);
+  } catch (error) {
+    console.warn('Heatmap update failed:', error);
+  }
+}
+
+export function recordHeatmapEvents(events) {
+  return reportHeatmapWrite('/heatmap/events', { method: 'POST', body: { events } });
+}
+
+// Check-ins the model could not classify are reported with emotion
+// "unknown": the backend keeps them out of the day's scores but counts
+// them, so its totals can be compared with Firestore.
+export function recordHeatmapCheckIns(checkins) {
+  return reportHeatmapWrite('/heatmap/checkins', { method: 'POST', body: { checkins } });
+}
+
+export function deleteHeatmapEvent(eventId) {
+  return reportHeatmapWrite(`/heatmap/events/${encodeURIComponent(eventId)}`, { method: 'DELETE' });
+}
+
+// month is 1-12. Resolves with the days that have events or check-ins and
+// the user's totals ({ events, checkins }); rejects when the backend is
+// unavailable.
+export async function fetchHeatmapMonth(year, month) {
+  const data = await heatmapRequest(`/heatmap/${year}/${month}`);
+  return {
+    days: Array.isArray(data.days) ? data.days : [],
+    totals: data.totals ?? { events: 0, checkins: 0 },
+  };
+}
+
+// The rollups can fall behind Firestore: a write or delete that failed to
+// reach the backend, history from before the rollups existed, or a rollup
+// store that was lost or lives on another host. Firestore's count
+// aggregations (no documents are downloaded) are compared with the totals
+// the backend reports; when they differ the user's history is read once
+// and replaces everything the backend has for them. Resolves true when it
+// did, and rejects if the backend could not take it.
+export async function syncHeatmapHistory(totals) {
+  const user = auth.currentUser;
+  if (!user) {
+    return false;
+  }
+  const eventsRef = collection(db, 'users', user.uid, 'calendarEvents');
+  const checkInsRef = collection(db, 'users', user.uid, 'dailyCheckIns');
+  const [eventCount, checkInCount] = await Promise.all([
+    getCountFromServer(eventsRef),
+    getCountFromServer(checkInsRef),
+  ]);
+  if (eventCount.data().count === totals.events && checkInCount.data().count === totals.checkins) {
+    return false;
+  }
+
+  const [eventsSnapshot, checkInsSnapshot] = await Promise.all([getDocs(eventsRef), getDocs(checkInsRef)]);
+  const events = [];
+  eventsSnapshot.forEach((eventDoc) => {
+    const { date } = eventDoc.data();
+    if (date) {
+      events.push({ event_id: eventDoc.id, date });
+    }
+  });
+  // Same summary the check-in screen reports on submit.
+  const checkins = [];
+  checkInsSnapshot.forEach((checkInDoc) => {
+    const data = checkInDoc.data();
+    const summary = deriveSummaryStats(sanitizeAnswers(data.answers ?? []));
+    checkins.push({
+      checkin_id: checkInDoc.id,
+      date: data.date ?? checkInDoc.id,
+      emotion: summary.emotion,
+      confidence: summary.confidence,
+    });
+  });
+
+  await heatmapRequest('/heatmap/history', { method: 'PUT', body: { events, checkins } });
+  return true;
+}
@@ -47,3 +47,85 @@ export async function sendChatMessage(sessionId, text) {
 
   return handleResponse(res);
 }
+
+// Streaming chat over the backend's chat socket (/chat/ws). Each message
+// gets the classification first, then the reply part by part, then the
+// complete response (the same shape sendChatMessage resolves with). The
+// socket stays open for the whole chat and is reopened if it drops.
+export function createChatStream(sessionId) {
+  const url = `${BASE_URL.replace(/^http/, "ws")}/chat/ws?session_id=${encodeURIComponent(sessionId)}`;
+  let socket = null;
+  let opening = null;
+  let pending = null;
+
+  const settle = (error, result) => {
+    if (!pending) return;
+    const { resolve, reject, timer } = pending;
+    pending = null;
+    clearTimeout(timer);
+    if (error) reject(error);
+    else resolve(result);
+  };
+
+  const handleEvent = (message) => {
+    let event;
+    try {
+      event = JSON.parse(message.data);
+    } catch {
+      return;
+    }
+    if (!pending) return;
+    if (event.event === "classification") {
+      pending.handlers.onClassification?.(event.data);
+    } else if (event.event === "reply") {
+      pending.handlers.onReply?.(event.data);
+    } else if (event.event === "done") {
+      settle(null, event.data);
+    } else if (event.event === "error") {
+      settle(new Error(event.data?.detail || "Chat request failed"));
+    }
+  };
+
+  const open = () => {
+    if (socket && socket.readyState === WebSocket.OPEN) return Promise.resolve(socket);
+    if (opening) return opening;
+    opening = new Promise((resolve, reject) => {
+      const ws = new WebSocket(url);
+      const timer = setTimeout(() => ws.close(), REQUEST_TIMEOUT);
+      ws.onopen = () => {
+        clearTimeout(timer);
+        socket = ws;
+        opening = null;
+        resolve(ws);
+      };
+      ws.onmessage = handleEvent;
+      // Not every platform follows a failed handshake with "close", so an
+      // error is handled the same way.
+      ws.onerror = ws.onclose = () => {
+        clearTimeout(timer);
+        if (socket === ws) socket = null;
+        opening = null;
+        reject(new Error("Chat connection closed"));
+        settle(new Error("Chat connection closed"));
+      };
+    });
+    return opening;
+  };
+
+  const send = async (text, handlers = {}) => {
+    const ws = await open();
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => settle(new Error("Chat request timed out")), REQUEST_TIMEOUT);
+      pending = { handlers, resolve, reject, timer };
+      ws.send(JSON.stringify({ text }));
+    });
+  };
+
+  const close = () => {
+    settle(new Error("Chat closed"));
+    socket?.close();
+    socket = null;
+  };
+
+  return { send, close };
+}
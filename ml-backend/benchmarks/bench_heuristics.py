@@ -0,0 +1,160 @@
+"""Microbenchmark: chatbot keyword heuristics, per-message cost.
+
+Run from ml-backend/:
+
+    python -m benchmarks.bench_heuristics
+    python -m benchmarks.bench_heuristics --lengths 10 50 200 1000 --repeats 2000
+
+Compares the original per-function substring scans (kept below as the
+reference implementation) with the precompiled single-pass matcher used
+by services/chatbot_service.py, and checks both give identical results.
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from services import chatbot_service as cs
+
+
+# -----------------------------------------------------------
+# REFERENCE: ORIGINAL PER-FUNCTION SCANS
+# -----------------------------------------------------------
+def legacy_academic(text: str, emotion: str) -> str:
+    t = text.lower()
+    high_k = list(cs.ACADEMIC_HIGH_KEYWORDS)
+    med_k = list(cs.ACADEMIC_MEDIUM_KEYWORDS)
+    burnout_k = list(cs.BURNOUT_KEYWORDS)
+    academic_k = list(cs.ACADEMIC_KEYWORDS)
+    if any(w in t for w in high_k):
+        return "academic_stress_high"
+    if any(w in t for w in burnout_k):
+        return "burnout"
+    if any(w in t for w in med_k):
+        return "academic_stress_medium"
+    if any(w in t for w in academic_k):
+        if emotion in ["fear", "sadness", "anger"]:
+            return "academic_stress_high"
+        if emotion == "surprise":
+            return "academic_stress_medium"
+        return "academic_stress_low"
+    if emotion in ["fear", "sadness", "anger"]:
+        return "academic_stress_medium"
+    return "academic_stress_low"
+
+
+def legacy_risk(text: str) -> str:
+    t = text.lower()
+    high_risk = list(cs.HIGH_RISK_KEYWORDS)
+    med_risk = list(cs.MEDIUM_RISK_KEYWORDS)
+    if any(w in t for w in high_risk):
+        return "high_risk"
+    if any(w in t for w in med_risk):
+        return "moderate_risk"
+    return "safe"
+
+
+def legacy_cbt(text: str) -> str:
+    t = text.lower()
+    groups = [
+        ("self_criticism", list(cs.SELF_CRITICISM_PATTERNS)),
+        ("all_or_nothing", list(cs.ALL_OR_NOTHING_PATTERNS)),
+        ("catastrophizing", list(cs.CATASTROPHIZING_PATTERNS)),
+        ("mind_reading", list(cs.MIND_READING_PATTERNS)),
+    ]
+    for name, words in groups:
+        if any(p in t for p in words):
+            return name
+    return "none"
+
+
+def legacy_theme(text: str) -> str:
+    t = text.lower()
+    if any(w in t for w in list(cs.THEME_ACADEMIC_TERMS)):
+        return "studies"
+    if any(w in t for w in list(cs.THEME_RELATIONSHIP_TERMS)):
+        return "relationships"
+    if any(w in t for w in list(cs.THEME_WORK_TERMS)):
+        return "work"
+    return "general"
+
+
+def legacy_message(text: str, emotion: str) -> tuple:
+    return legacy_academic(text, emotion), legacy_risk(text), legacy_cbt(text), legacy_theme(text)
+
+
+def current_message(text: str, emotion: str) -> tuple:
+    hits = cs.scan_keywords(text)
+    cbt = cs._detect_cbt_pattern(text, hits)
+    cbt_name = "none"
+    if cbt is not None:
+        for name in ("self_criticism", "all_or_nothing", "catastrophizing", "mind_reading"):
+            if f"cbt_{name}" in hits:
+                cbt_name = name
+                break
+    return (
+        cs.academic_stress_classifier(text, emotion, hits),
+        cs.risk_detector(text, hits),
+        cbt_name,
+        cs._classify_theme_from_history([], text, hits),
+    )
+
+
+# -----------------------------------------------------------
+# CORPUS
+# -----------------------------------------------------------
+FILLER = (
+    "today i went to the library and then had lunch with some people and "
+    "thought about what i need to do next week and how it all fits together "
+).split()
+
+
+def make_corpus(n: int, words: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    keywords = [w for words_ in cs.keyword_matcher.categories.values() for w in words_]
+    corpus = []
+    for _ in range(n):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        for _ in range(rng.randint(0, 3)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(keywords).upper() if rng.random() < 0.2 else rng.choice(keywords))
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def _time(fn, corpus: List[str], repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text in corpus:
+            fn(text, "sadness")
+    return (time.perf_counter() - start) / (repeats * len(corpus))
+
+
+def run(lengths: List[int], repeats: int, samples: int) -> List[Dict]:
+    rows = []
+    for words in lengths:
+        corpus = make_corpus(samples, words)
+        for text in corpus:
+            expected, got = legacy_message(text, "sadness"), current_message(text, "sadness")
+            assert expected == got, f"mismatch for {text!r}: {expected} != {got}"
+        reps = max(1, repeats // max(1, words // 10))
+        legacy = _time(legacy_message, corpus, reps)
+        current = _time(current_message, corpus, reps)
+        rows.append({"words": words, "legacy_us": legacy * 1e6, "matcher_us": current * 1e6, "speedup": legacy / current})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chatbot keyword heuristics microbenchmark")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 200, 1000], help="words per message")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"matcher engine: {cs.keyword_matcher.engine}")
+    print(f"{'words':>6} {'legacy us/msg':>14} {'matcher us/msg':>15} {'speedup':>8}")
+    for row in run(args.lengths, args.repeats, args.samples):
+        print(f"{row['words']:>6} {row['legacy_us']:>14.1f} {row['matcher_us']:>15.1f} {row['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies_s: List[float]) -> Dict[str, float]:
+    values = sorted(latencies_s)
+    return {
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "mean_ms": (sum(values) / len(values) * 1000) if values else 0.0,
+    }
+
+
+def peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "emotion_model": os.getenv("EMOTION_MODEL_NAME", "j-hartmann/emotion-english-distilroberta-base"),
+        "emotion_backend": os.getenv("EMOTION_BACKEND", "torch"),
+    }
+
+
+def write_results(kind: str, results: Dict, output: Optional[str]) -> Path:
+    payload = {"kind": kind, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), **results}
+    path = Path(output) if output else RESULTS_DIR / f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2))
+    return path
+
+
+def compare(current: Dict[str, Dict], baseline_path: str, threshold: float) -> bool:
+    """Print per-metric changes against a previous results file.
+
+    Latency-like metrics (``*_ms``, ``*_us``) regress when they grow by more
+    than ``threshold``; ``throughput_rps`` regresses when it drops by more
+    than ``threshold``. Returns False if anything regressed.
+    """
+
+    baseline = json.loads(Path(baseline_path).read_text())["scenarios"]
+    ok = True
+    for name, metrics in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key, value in metrics.items():
+            old = base.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            if key.endswith(("_ms", "_us")):
+                regressed = change > threshold
+            elif key == "throughput_rps":
+                regressed = change < -threshold
+            else:
+                continue
+            ok = ok and not regressed
+            flag = "REGRESSION" if regressed else ""
+            print(f"{name:<28} {key:<16} {old:>12.3f} -> {value:>12.3f} ({change:+.1%}) {flag}")
+    return ok
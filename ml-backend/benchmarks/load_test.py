@@ -0,0 +1,160 @@
+"""In-process load test for the ml-backend API.
+
+Run from ml-backend/:
+
+    python -m benchmarks.load_test --tiny-model
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 500
+    python -m benchmarks.load_test --tiny-model --compare benchmarks/results/load-baseline.json
+
+The FastAPI app runs in this process behind httpx's ASGI transport, so no
+server or network is involved. ``--tiny-model`` swaps the emotion model
+for a small random stand-in (see benchmarks/tiny_model.py) so the run
+needs no model download. Each scenario reports throughput, p50/p95/p99
+latency and error count; peak RSS is reported for the whole run. Results
+are written as JSON so runs can be compared for regressions.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import compare, latency_summary, peak_rss_bytes, write_results
+
+TEXTS = [
+    "I'm tired",
+    "stressed about exams",
+    "I can't focus and the deadline is tomorrow.",
+    "My friends didn't invite me and I feel left out.",
+    "I always mess everything up, I'm a failure.",
+    "Slept well and went for a run this morning.",
+    "Burnt out after a week of night shifts and coursework.",
+    "My parents keep asking about my grades and it makes me anxious.",
+]
+CHAT_TURNS = 5
+
+
+async def _emotion_predict(client, rng):
+    return [await client.post("/emotion/predict", json={"text": rng.choice(TEXTS)})]
+
+
+async def _chatbot_analyze(client, rng):
+    user_id = f"bench-{rng.randrange(10_000)}"
+    return [await client.post("/chatbot/analyze", json={"user_id": user_id, "text": rng.choice(TEXTS)})]
+
+
+async def _chat_session(client, rng):
+    start = await client.post("/chatbot/chat/start")
+    responses = [start]
+    if start.status_code != 200:
+        return responses
+    session_id = start.json()["session_id"]
+    for _ in range(CHAT_TURNS):
+        responses.append(await client.post("/chatbot/chat/message", json={"session_id": session_id, "text": rng.choice(TEXTS)}))
+    return responses
+
+
+async def _cluster_predict(client, rng):
+    scores = {"stress": rng.uniform(0, 42), "anxiety": rng.uniform(0, 42), "depression": rng.uniform(0, 42)}
+    return [await client.post("/predict", json=scores)]
+
+
+async def _stress_predict(client, rng):
+    return [await client.post("/predict-stress/", json={"nickname": "bench", "text": rng.choice(TEXTS)})]
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "emotion_predict": _emotion_predict,
+    "chatbot_analyze": _chatbot_analyze,
+    "chat_session": _chat_session,
+    "cluster_predict": _cluster_predict,
+    "stress_predict": _stress_predict,
+}
+
+
+async def run_scenario(app, name: str, concurrency: int, total: int, seed: int) -> Dict:
+    import httpx
+
+    scenario = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker(worker_id: int, client):
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            responses = await scenario(client, rng)
+            latencies.append(time.perf_counter() - start)
+            errors += sum(1 for r in responses if r.status_code != 200)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        **latency_summary(latencies),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-process load test for ml-backend")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests (or chat sessions) per scenario and concurrency")
+    parser.add_argument("--tiny-model", action="store_true", help="use a small local stand-in emotion model")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/load-<time>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    if args.tiny_model:
+        from benchmarks.tiny_model import build_tiny_model
+
+        os.environ["EMOTION_MODEL_NAME"] = build_tiny_model(os.path.join(tempfile.mkdtemp(), "tiny-emotion"))
+
+    # Import after the environment is set: the app reads its settings at import.
+    import main as backend
+    from services.model_registry import registry
+
+    registry.load_all()
+    if not registry.is_ready():
+        print(f"Models failed to load: {registry.status()}")
+        return 1
+
+    scenarios: Dict[str, Dict] = {}
+    print(f"{'scenario':<28} {'conc':>4} {'reqs':>6} {'err':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in args.scenarios:
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_scenario(backend.app, name, concurrency, args.requests, args.seed))
+            key = f"{name}@c{concurrency}"
+            scenarios[key] = result
+            print(
+                f"{key:<28} {concurrency:>4} {result['requests']:>6} {result['errors']:>4} "
+                f"{result['throughput_rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+            )
+
+    rss = peak_rss_bytes()
+    print(f"peak RSS: {rss / 2**20:.1f} MiB" if rss else "peak RSS: unavailable")
+    path = write_results("load", {"peak_rss_bytes": rss, "scenarios": scenarios}, args.output)
+    print(f"results written to {path}")
+
+    if args.compare:
+        return 0 if compare(scenarios, args.compare, args.threshold) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Microbenchmarks for the cheap, pure-Python parts of ml-backend.
+
+Run from ml-backend/:
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --compare benchmarks/results/micro-baseline.json
+
+Covers extract_keywords, the chatbot keyword heuristics and KMeans
+cluster scoring (single-row and batched). None of these touch the
+transformer, so no model download is needed.
+"""
+import argparse
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+from benchmarks.common import compare, peak_rss_bytes, write_results
+
+
+def _per_call_us(fn: Callable[[], object], min_time_s: float) -> float:
+    fn()
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time_s:
+            return elapsed / calls * 1e6
+
+
+def bench_extract_keywords(min_time_s: float) -> Dict[str, Dict]:
+    from services.emotion_service import extract_keywords
+
+    short = "I'm so stressed about my exams and the assignment deadline"
+    long = " ".join([short] * 40)
+    return {
+        "extract_keywords.short": {"per_call_us": _per_call_us(lambda: extract_keywords(short), min_time_s)},
+        "extract_keywords.long": {"per_call_us": _per_call_us(lambda: extract_keywords(long), min_time_s)},
+    }
+
+
+def bench_heuristics(min_time_s: float) -> Dict[str, Dict]:
+    from benchmarks.bench_heuristics import current_message, make_corpus
+
+    results = {}
+    for words in (10, 200):
+        corpus = make_corpus(50, words)
+
+        def run():
+            for text in corpus:
+                current_message(text, "sadness")
+
+        results[f"chatbot_heuristics.{words}w"] = {"per_call_us": _per_call_us(run, min_time_s) / len(corpus)}
+    return results
+
+
+def bench_cluster_scoring(min_time_s: float) -> Dict[str, Dict]:
+    from services.cluster_service import _load_cluster_model, score_clusters
+
+    centroids = _load_cluster_model().centroids
+    rng = np.random.default_rng(0)
+    row = rng.uniform(0, 42, (1, 3))
+    cohort = rng.uniform(0, 42, (10_000, 3))
+    return {
+        "cluster_scoring.single_row": {"per_call_us": _per_call_us(lambda: score_clusters(row, centroids), min_time_s)},
+        "cluster_scoring.10k_rows": {"per_call_us": _per_call_us(lambda: score_clusters(cohort, centroids), min_time_s)},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="ml-backend microbenchmarks")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to run each benchmark")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/micro-<time>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    scenarios: Dict[str, Dict] = {}
+    for bench in (bench_extract_keywords, bench_heuristics, bench_cluster_scoring):
+        scenarios.update(bench(args.min_time))
+
+    for name, result in scenarios.items():
+        print(f"{name:<32} {result['per_call_us']:>12.2f} us/call")
+
+    path = write_results("micro", {"peak_rss_bytes": peak_rss_bytes(), "scenarios": scenarios}, args.output)
+    print(f"results written to {path}")
+
+    if args.compare:
+        return 0 if compare(scenarios, args.compare, args.threshold) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
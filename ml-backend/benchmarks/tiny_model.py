@@ -0,0 +1,73 @@
+"""Build a tiny, randomly initialised stand-in for the emotion model.
+
+Run from ml-backend/:
+
+    python -m benchmarks.tiny_model /tmp/tiny-emotion
+    EMOTION_MODEL_NAME=/tmp/tiny-emotion uvicorn main:app
+
+It has the same labels and input/output shapes as
+j-hartmann/emotion-english-distilroberta-base but only a few thousand
+parameters and a word-level tokenizer, so benchmarks and local runs need
+no network access. Its predictions are meaningless; only use it to
+measure the serving path.
+"""
+import sys
+from pathlib import Path
+
+LABELS = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>"]
+VOCAB_WORDS = (
+    "i am im so very really feel feeling tired stressed about exam exams assignment deadline project "
+    "study studying lecture school university college grade grades happy sad angry scared worried "
+    "anxious overwhelmed burnt out exhausted friend friends family work job the a to my and of it "
+    "not can't cant focus always never fail failure useless hopeless kill myself die today week"
+).split()
+
+
+def build_tiny_model(out_dir: str, hidden_size: int = 32, layers: int = 2) -> str:
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers
+    from tokenizers.processors import TemplateProcessing
+    from transformers import PreTrainedTokenizerFast, RobertaConfig, RobertaForSequenceClassification
+
+    vocab = {tok: i for i, tok in enumerate(SPECIAL_TOKENS)}
+    for word in VOCAB_WORDS:
+        vocab.setdefault(word, len(vocab))
+
+    tok = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tok.normalizer = normalizers.Lowercase()
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.post_processor = TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", vocab["<s>"]), ("</s>", vocab["</s>"])]
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tok,
+        bos_token="<s>",
+        eos_token="</s>",
+        pad_token="<pad>",
+        unk_token="<unk>",
+        model_max_length=512,
+    )
+
+    config = RobertaConfig(
+        vocab_size=len(vocab),
+        hidden_size=hidden_size,
+        num_hidden_layers=layers,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=514,
+        pad_token_id=vocab["<pad>"],
+        num_labels=len(LABELS),
+        id2label=dict(enumerate(LABELS)),
+        label2id={label: i for i, label in enumerate(LABELS)},
+    )
+    model = RobertaForSequenceClassification(config)
+
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    tokenizer.save_pretrained(out_dir)
+    model.save_pretrained(out_dir)
+    return out_dir
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "benchmarks/tiny-emotion"
+    print(f"Tiny emotion model written to {build_tiny_model(target)}")
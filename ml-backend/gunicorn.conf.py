@@ -0,0 +1,56 @@
+"""Multi-process serving with gunicorn + uvicorn workers.
+
+Run from ml-backend/:
+
+    pip install gunicorn
+    gunicorn main:app -c gunicorn.conf.py
+    WEB_CONCURRENCY=8 TORCH_THREADS_PER_WORKER=4 gunicorn main:app -c gunicorn.conf.py
+
+The app is imported and every model is loaded once in the gunicorn master,
+before any worker is forked. Workers inherit the already-loaded weights
+copy-on-write, so N workers share one copy of the transformer, KMeans and
+TF-IDF artifacts instead of loading N copies. The master loads with a
+single torch thread (a forked child cannot reuse the parent's OpenMP
+pool); each worker then sets its own intra-op thread count so the workers
+together use every core once instead of oversubscribing them.
+
+ONNX Runtime sessions are not fork-safe, so with EMOTION_BACKEND=onnx or
+onnx-int8 the emotion model is loaded in each worker instead.
+"""
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(1, (os.cpu_count() or 1) // 4))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0")) or max(1, (os.cpu_count() or 1) // workers)
+
+
+def when_ready(server):
+    # Runs in the master after main:app was imported (preload_app) and
+    # before the first worker is forked.
+    import torch
+    from services.emotion_backends import ensure_onnx_model
+    from services.inference_engine import BACKEND, MODEL_NAME
+    from services.model_registry import registry
+
+    torch.set_num_threads(1)
+    if BACKEND != "torch":
+        # Export once here; the workers then only open the finished file.
+        ensure_onnx_model(MODEL_NAME, quantized=BACKEND == "onnx-int8")
+    names = [name for name in registry.status() if name != "emotion" or BACKEND == "torch"]
+    registry.load_all(names=names)
+    # Move everything allocated so far out of the collector's generations,
+    # so gc passes in the workers do not write to (and copy) shared pages.
+    gc.freeze()
+    server.log.info(f"Preloaded models {names}; {workers} workers x {TORCH_THREADS_PER_WORKER} torch threads")
+
+
+def post_fork(server, worker):
+    import torch
+
+    torch.set_num_threads(TORCH_THREADS_PER_WORKER)
@@ -1,13 +1,35 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-import joblib
-import numpy as np
-from utils.cluster_labels import LABELS
-from routes.voice_routes import router as voice_routes
+from contextlib import asynccontextmanager
+import json
+from typing import Optional
+import time
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from services.model_registry import registry
+from services.metrics import metrics, REQUEST_SECONDS
+from services.cluster_service import (
+    UserScores, ClusterBatchRequest, ClusterBatchResponse,
+    predict_cluster_service, predict_cluster_batch_service, cluster_model_info,
+)
+from routes.voice_routes import router as voice_routes, stream_router as voice_stream_routes
 from services.emotion_service import (
     PredictRequest, PredictResponse, CopingStrategyRequest, CopingStrategyResponse,
-    predict, coping_strategy, health, MODEL_NAME
+    PredictBatchRequest, PredictBatchResponse,
+    predict, predict_batch, coping_strategy, cached_coping_strategy, health, MODEL_NAME
+)
+from services.coping_catalog import coping_catalog
+from services.auth import current_user_id
+from services.heatmap_service import (
+    HeatmapEventsRequest, HeatmapCheckInsRequest, HeatmapHistoryRequest, HeatmapMonthResponse,
+    record_events_service, delete_event_service, record_checkins_service, replace_history_service,
+    heatmap_month_service,
 )
+from services.inference_engine import health_service as inference_health_service
+from services.inference_scheduler import scheduler
+from services.executor import inference_pool
+from services.inference_cache import cache as inference_cache
+from services.cascade import cascade_stats
+from services.degradation import degradation
 
 # =====  Chatbot Imports =====
 from services.chatbot_service import (
@@ -17,26 +39,73 @@ from services.chatbot_service import (
     ChatMessageInput,
     ChatMessageResponse,
     health_service as chatbot_health_service,
+    session_stats_service,
+    Sessions,
     analyze_text_service,
     chat_start_service,
     chat_message_service,
+    prepare_chat_turn,
+    iter_chat_turn_events,
+    format_sse,
+    is_high_risk,
 
 )
 
-app = FastAPI()
 
-# Load model at startup
-model = joblib.load("models/model.pkl")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in the background so /live answers immediately; routes
+    # return 503 until their model is ready and /ready reports when all are.
+    registry.start_background_load()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
 
-class UserScores(BaseModel):
-    stress: float
-    anxiety: float
-    depression: float
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            route=getattr(route, "path", "unmatched"),
+            method=request.method,
+            status=status,
+        )
+
+
+metrics.callback("mindplus_inference_queue_depth", "Texts waiting for a batched forward pass.", lambda: scheduler.stats()["queue_depth"])
+metrics.callback("mindplus_inference_pool_in_flight", "Requests running or waiting in the inference pool.", lambda: inference_pool.in_flight)
+metrics.callback("mindplus_inference_cache_hits_total", "Emotion cache hits.", lambda: inference_cache.hits, kind="counter")
+metrics.callback("mindplus_inference_cache_misses_total", "Emotion cache misses.", lambda: inference_cache.misses, kind="counter")
+metrics.callback("mindplus_inference_cache_evictions_total", "Emotion cache evictions.", lambda: inference_cache.local.evictions, kind="counter")
+metrics.callback("mindplus_degraded", "1 while chat and analyze answer without the emotion model.", lambda: int(degradation.degraded))
+metrics.callback("mindplus_chat_sessions_active", "Active chatbot Sessions.", lambda: len(Sessions))
 
 @app.get("/")
 def root():
     return {"message": "Stress ML Backend running"}
 
+@app.get("/live")
+def live():
+    return {"status": "alive"}
+
+@app.get("/ready")
+def ready():
+    status = {"status": "ready" if registry.is_ready() else "loading", "models": registry.status()}
+    return JSONResponse(status, status_code=200 if registry.is_ready() else 503)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/emotionhealth")
 async def health_check():
     return await health()
@@ -45,41 +114,105 @@ async def health_check():
 def chatbot_health_check():
     return chatbot_health_service()
 
+@app.get("/inference/health")
+def inference_health_check():
+    return {
+        **inference_health_service(),
+        "scheduler": scheduler.stats(),
+        "pool": inference_pool.stats(),
+        "cascade": cascade_stats.stats(),
+        "degradation": degradation.stats(),
+    }
+
+@app.get("/inference/cache/stats")
+def inference_cache_stats():
+    return inference_cache.stats()
+
 @app.post("/emotion/predict", response_model=PredictResponse)
-async def emotion_predict(payload: PredictRequest):
-    return await predict(payload)
+async def emotion_predict(payload: PredictRequest, request: Request):
+    return await predict(payload, request.client.host if request.client else "")
+
+@app.post("/emotion/predict/batch", response_model=PredictBatchResponse)
+async def emotion_predict_batch(payload: PredictBatchRequest):
+    return await predict_batch(payload)
 
 @app.post("/emotion/coping-strategy", response_model=CopingStrategyResponse)
 async def emotion_coping_strategy(payload: CopingStrategyRequest):
     return await coping_strategy(payload)
 
+@app.get("/emotion/coping-strategy", response_model=CopingStrategyResponse)
+def emotion_coping_strategy_cached(
+    emotion: str,
+    severity: Optional[str] = None,
+    confidence: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    return cached_coping_strategy(emotion, severity, confidence, if_none_match)
+
+@app.get("/emotion/coping-strategy/catalog")
+def emotion_coping_catalog_stats():
+    return coping_catalog.stats()
+
 @app.post("/predict")
 def predict_cluster(scores: UserScores):
+    return predict_cluster_service(scores)
 
-    # Convert input to numpy array
-    x = np.array([[scores.stress, scores.anxiety, scores.depression]])
+@app.post("/predict/batch", response_model=ClusterBatchResponse)
+def predict_cluster_batch(payload: ClusterBatchRequest):
+    return predict_cluster_batch_service(payload)
 
-    # Get cluster index
-    cluster_id = model.predict(x)[0]
+@app.get("/predict/model")
+def cluster_model():
+    return cluster_model_info()
 
-    # Return cluster label from dictionary
-    label = LABELS.get(cluster_id, "unknown")
+# ================= HEATMAP ROUTES ====================
 
-    # Confidence: inverse distance to centroid (simple metric)
-    distances = model.transform(x)[0]
-    confidence = float(1 / (1 + distances[cluster_id]))
+# Every heatmap route acts on the caller's own data: the user id comes from
+# the verified Firebase ID token, not from the request.
 
-    return {
-        "clusterId": int(cluster_id),
-        "label": label,
-        "confidence": confidence
-    }
+@app.post("/heatmap/events")
+def heatmap_record_events(payload: HeatmapEventsRequest, user_id: str = Depends(current_user_id)):
+    return record_events_service(user_id, payload)
+
+@app.delete("/heatmap/events/{event_id}")
+def heatmap_delete_event(event_id: str, user_id: str = Depends(current_user_id)):
+    return delete_event_service(user_id, event_id)
+
+@app.post("/heatmap/checkins")
+def heatmap_record_checkins(payload: HeatmapCheckInsRequest, user_id: str = Depends(current_user_id)):
+    return record_checkins_service(user_id, payload)
+
+@app.put("/heatmap/history")
+def heatmap_replace_history(payload: HeatmapHistoryRequest, user_id: str = Depends(current_user_id)):
+    return replace_history_service(user_id, payload)
+
+@app.get("/heatmap/{year}/{month}", response_model=HeatmapMonthResponse)
+def heatmap_month(year: int, month: int, user_id: str = Depends(current_user_id)):
+    return heatmap_month_service(user_id, year, month)
 
 # ================= CHATBOT ROUTES ====================
 
+@app.get("/chatbot/sessions/stats")
+def chatbot_session_stats():
+    return session_stats_service()
+
+
+async def run_risk_first(fn, input, text: str, client_key: str):
+    """High-risk messages bypass the bounded inference pool (and any queue
+    in front of it) so the safety reply never waits behind other traffic.
+    In degraded mode nothing waits for the model, so everything does.
+
+    Degradation is decided once and passed to ``fn``, so a request that
+    takes the unbounded threadpool never runs the model there."""
+    degraded = degradation.active()
+    if is_high_risk(text) or degraded:
+        return await run_in_threadpool(fn, input, degraded)
+    return await inference_pool.run(fn, input, degraded, client_key=client_key)
+
+
 @app.post("/chatbot/analyze", response_model=AnalysisResult)
-def analyze_text(input: TextInput):
-    return analyze_text_service(input)
+async def analyze_text(input: TextInput):
+    return await run_risk_first(analyze_text_service, input, input.text, input.user_id)
 
 
 @app.post("/chatbot/chat/start", response_model=ChatStartResponse)
@@ -88,9 +221,66 @@ def chat_start():
 
 
 @app.post("/chatbot/chat/message", response_model=ChatMessageResponse)
-def chat_message(input: ChatMessageInput):
-    return chat_message_service(input)
+async def chat_message(input: ChatMessageInput):
+    return await run_risk_first(chat_message_service, input, input.text, input.session_id)
+
+
+@app.post("/chatbot/chat/stream")
+async def chat_message_stream(input: ChatMessageInput):
+    # Validation and classification happen before the stream opens, so
+    # those errors still come back as normal 4xx/5xx responses. The reply
+    # parts are then built and sent one at a time (on the threadpool, via
+    # StreamingResponse) and the turn is recorded after the last one.
+    turn = await run_risk_first(prepare_chat_turn, input, input.text, input.session_id)
+    events = (format_sse(event) for event in iter_chat_turn_events(turn))
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/chatbot/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """Persistent chat socket.
+
+    Connect with ``?session_id=...`` to continue a session, or without it to
+    start a new one. Send ``{"text": "..."}`` per message; each message gets
+    the same events as /chatbot/chat/stream, as JSON objects.
+    """
+    await websocket.accept()
+    session_id = websocket.query_params.get("session_id") or chat_start_service().session_id
+    await websocket.send_json({"event": "session", "data": {"session_id": session_id}})
+
+    try:
+        while True:
+            try:
+                payload = await websocket.receive_json()
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Not a JSON text frame; the socket stays open.
+                await websocket.send_json({"event": "error", "data": {"status": 400, "detail": "Expected a JSON text frame"}})
+                continue
+            text = str(payload.get("text", "") if isinstance(payload, dict) else "")
+            try:
+                turn = await run_risk_first(
+                    prepare_chat_turn, ChatMessageInput(session_id=session_id, text=text), text, session_id
+                )
+                async for event in iterate_in_threadpool(iter_chat_turn_events(turn)):
+                    await websocket.send_json(event)
+                continue
+            except WebSocketDisconnect:
+                raise
+            except HTTPException as exc:
+                error = {"status": exc.status_code, "detail": exc.detail}
+            except Exception as exc:
+                # One failed turn must not close the socket.
+                print(f"Chat turn failed: {exc!r}")
+                error = {"status": 500, "detail": f"Error: {exc}"}
+            await websocket.send_json({"event": "error", "data": error})
+    except WebSocketDisconnect:
+        return
 
 
 # Include voice routes
 app.include_router(voice_routes)
+app.include_router(voice_stream_routes)
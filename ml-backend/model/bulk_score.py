@@ -0,0 +1,202 @@
+"""Offline bulk scoring with the /chatbot/analyze pipeline.
+
+Run from ml-backend/:
+
+    python -m model.bulk_score answers.jsonl scored.jsonl
+    python -m model.bulk_score messages.csv scored.jsonl --text-field message --workers 4
+    python -m model.bulk_score answers.jsonl scored.jsonl --resume
+
+Streams JSONL or CSV input (one record per line/row), runs the same
+analysis as /chatbot/analyze (emotion, stress, academic category, risk,
+overall status) in a pool of worker processes with batched emotion
+inference, and streams one JSON line per input record to the output in
+input order. Memory stays flat: only a bounded number of batches is in
+flight at any time.
+
+A checkpoint (``<output>.ckpt`` by default) records how many input records
+have been written and the matching output size. After a crash, ``--resume``
+truncates the output to the last checkpoint and skips that many records.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Record = Tuple[int, Optional[str], str]
+
+
+# -----------------------------------------------------------
+# INPUT
+# -----------------------------------------------------------
+def read_records(path: str, fmt: str, text_field: str, id_field: str, skip: int = 0) -> Iterator[Record]:
+    """Yield ``(record_index, id, text)`` for every input record after ``skip``."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(f) if fmt == "csv" else (line for line in f if line.strip())
+        for index, row in enumerate(rows):
+            if index < skip:
+                continue
+            if fmt != "csv":
+                row = json.loads(row)
+            record_id = row.get(id_field)
+            yield index, None if record_id is None else str(record_id), row.get(text_field) or ""
+
+
+def batched(records: Iterator[Record], size: int) -> Iterator[List[Record]]:
+    batch: List[Record] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -----------------------------------------------------------
+# WORKERS
+# -----------------------------------------------------------
+def _init_worker(threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(threads)
+    import services.chatbot_service  # noqa: F401  (registers the emotion model)
+    from services.model_registry import registry
+
+    registry.load_all(names=["emotion"])
+    registry.get("emotion")
+
+
+def score_batch(batch: List[Record]) -> List[str]:
+    """Analyze one batch and return its output lines, in input order."""
+    from services.chatbot_service import build_analysis
+    from services.inference_engine import classify_batch
+
+    texts = [text.strip() for _, _, text in batch]
+    non_empty = [t for t in texts if t]
+    labels = iter(p["label"] for p in classify_batch(non_empty)) if non_empty else iter(())
+
+    lines = []
+    for (index, record_id, _), text in zip(batch, texts):
+        out: Dict = {"record": index}
+        if record_id is not None:
+            out["id"] = record_id
+        if text:
+            out.update(build_analysis(text, next(labels)).model_dump())
+        else:
+            out["error"] = "Text cannot be empty"
+        lines.append(json.dumps(out, ensure_ascii=False) + "\n")
+    return lines
+
+
+# -----------------------------------------------------------
+# CHECKPOINTS
+# -----------------------------------------------------------
+def load_checkpoint(path: str, input_path: str) -> Dict:
+    if not os.path.exists(path):
+        return {"records": 0, "output_bytes": 0}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("input") != os.path.abspath(input_path):
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('input')}, not {input_path}")
+    return checkpoint
+
+
+def save_checkpoint(path: str, input_path: str, records: int, output_bytes: int) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"input": os.path.abspath(input_path), "records": records, "output_bytes": output_bytes}, f)
+    os.replace(tmp, path)
+
+
+# -----------------------------------------------------------
+# DRIVER
+# -----------------------------------------------------------
+def run(args) -> int:
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    checkpoint_path = args.checkpoint or args.output + ".ckpt"
+    checkpoint = load_checkpoint(checkpoint_path, args.input) if args.resume else {"records": 0, "output_bytes": 0}
+
+    if checkpoint["output_bytes"]:
+        # Resuming cuts the output back to the checkpoint; that is only
+        # valid if everything up to it is still there.
+        size = os.path.getsize(args.output) if os.path.exists(args.output) else None
+        if size is None or size < checkpoint["output_bytes"]:
+            found = "missing" if size is None else f"only {size} bytes"
+            raise SystemExit(
+                f"Cannot resume: {args.output} is {found} but {checkpoint_path} expects "
+                f"{checkpoint['output_bytes']} bytes. Remove the checkpoint to start over."
+            )
+    out = open(args.output, "r+b" if args.resume and os.path.exists(args.output) else "wb")
+    out.truncate(checkpoint["output_bytes"])
+    out.seek(checkpoint["output_bytes"])
+    done = checkpoint["records"]
+    if done:
+        print(f"Resuming after {done} records", file=sys.stderr)
+
+    records = read_records(args.input, fmt, args.text_field, args.id_field, skip=done)
+    batches = batched(records, args.batch_size)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+    max_in_flight = args.workers * 2
+
+    started = last_report = time.perf_counter()
+    scored = 0
+    since_checkpoint = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((len(batch), pool.submit(score_batch, batch)))
+            if len(pending) < max_in_flight:
+                continue
+            size, future = pending.popleft()
+            out.write("".join(future.result()).encode("utf-8"))
+            scored += size
+            since_checkpoint += size
+            if since_checkpoint >= args.checkpoint_every:
+                out.flush()
+                os.fsync(out.fileno())
+                save_checkpoint(checkpoint_path, args.input, done + scored, out.tell())
+                since_checkpoint = 0
+            now = time.perf_counter()
+            if now - last_report >= args.progress_every:
+                last_report = now
+                print(f"{done + scored} records ({scored / (now - started):.1f} rec/s)", file=sys.stderr)
+        while pending:
+            size, future = pending.popleft()
+            out.write("".join(future.result()).encode("utf-8"))
+            scored += size
+
+    out.flush()
+    os.fsync(out.fileno())
+    save_checkpoint(checkpoint_path, args.input, done + scored, out.tell())
+    out.close()
+    elapsed = time.perf_counter() - started
+    print(f"Scored {scored} records in {elapsed:.1f}s ({scored / elapsed if elapsed else 0:.1f} rec/s), {done + scored} total", file=sys.stderr)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-score JSONL/CSV records with the /chatbot/analyze pipeline")
+    parser.add_argument("input", help="JSONL or CSV file")
+    parser.add_argument("output", help="JSONL results file")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from the file extension)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id", help="copied to the output when present")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-worker", type=int, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--checkpoint", help="checkpoint path (default: <output>.ckpt)")
+    parser.add_argument("--checkpoint-every", type=int, default=5000, help="records between checkpoints")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
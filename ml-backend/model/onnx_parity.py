@@ -0,0 +1,85 @@
+"""Parity and latency check for the ONNX emotion backends.
+
+Run from ml-backend/:
+
+    python -m model.onnx_parity
+    python -m model.onnx_parity --backends onnx-int8 --min-agreement 0.95
+
+Exports (and quantizes) the model on first use, then compares the top
+label and the class probabilities of each ONNX backend against the torch
+path on a fixed corpus, and reports mean latency per batch.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from services.emotion_backends import load_backend, time_backend
+
+MODEL_NAME = os.getenv("EMOTION_MODEL_NAME", "j-hartmann/emotion-english-distilroberta-base")
+
+CORPUS = [
+    "I'm tired",
+    "stressed about exams",
+    "I feel great today, finally finished my assignment!",
+    "I can't focus and the deadline is tomorrow.",
+    "My friends didn't invite me and I feel left out.",
+    "I'm so angry at my group for not doing their part of the project.",
+    "Nothing matters anymore, I feel empty inside.",
+    "I'm scared I will fail the midterm.",
+    "Wow, I did not expect to get an A on that quiz.",
+    "The lecture was okay, nothing special.",
+    "I always mess everything up, I'm a failure.",
+    "Burnt out after a week of night shifts and coursework.",
+    "My parents keep asking about my grades and it makes me anxious.",
+    "Slept well and went for a run this morning.",
+    "That cafeteria food was disgusting.",
+    "I don't know how to feel about moving to a new university next term.",
+]
+
+
+def _encode(tokenizer, texts, batch_size):
+    batches = []
+    for i in range(0, len(texts), batch_size):
+        batches.append(tokenizer(texts[i:i + batch_size], return_tensors="np", padding=True, truncation=True, max_length=256))
+    return batches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-agreement", type=float, default=0.9, help="required share of matching top labels")
+    parser.add_argument("--max-score-diff", type=float, default=0.1, help="allowed max abs probability difference")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    batches = _encode(tokenizer, CORPUS, args.batch_size)
+
+    reference = load_backend("torch", MODEL_NAME)
+    ref_probs = np.vstack([reference.predict_proba(b) for b in batches])
+    ref_latency = time_backend(reference, batches, args.repeats)
+    print(f"torch       latency {ref_latency * 1000:8.2f} ms/batch")
+
+    ok = True
+    for name in args.backends:
+        candidate = load_backend(name, MODEL_NAME)
+        probs = np.vstack([candidate.predict_proba(b) for b in batches])
+        agreement = float(np.mean(probs.argmax(axis=1) == ref_probs.argmax(axis=1)))
+        max_diff = float(np.abs(probs - ref_probs).max())
+        latency = time_backend(candidate, batches, args.repeats)
+        passed = agreement >= args.min_agreement and max_diff <= args.max_score_diff
+        ok = ok and passed
+        print(
+            f"{name:<11} latency {latency * 1000:8.2f} ms/batch  speedup {ref_latency / latency:5.2f}x  "
+            f"label agreement {agreement:.2%}  max score diff {max_diff:.4f}  {'PASS' if passed else 'FAIL'}"
+        )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
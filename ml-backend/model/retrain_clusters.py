@@ -0,0 +1,141 @@
+"""Incremental retraining of the DASS cluster model.
+
+Run from ml-backend/:
+
+    python -m model.retrain_clusters scores.csv                 # train a new version
+    python -m model.retrain_clusters scores.jsonl --activate    # ...and serve it
+    python -m model.retrain_clusters --activate-version v0002   # switch / roll back
+    python -m model.retrain_clusters --list
+
+Streams stress/anxiety/depression rows (CSV or JSONL) in chunks and
+updates the latest version's clusters (or --parent's) with
+MiniBatchKMeans.partial_fit, so new data refines the existing centroids
+instead of refitting from scratch.
+The estimator (with its per-cluster sample counts) is stored in every
+artifact, so the next run continues where this one stopped.
+
+Cluster ids stay attached to the same LABELS across versions: the new
+centroids are matched to the previous ones (minimum total distance) and
+served in that order. The result is written as a new immutable version;
+--activate points models/clusters/CURRENT at it, and running servers pick
+it up within CLUSTER_MODEL_CHECK_S seconds without a restart.
+"""
+import argparse
+import sys
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import MiniBatchKMeans
+
+from utils.cluster_artifacts import (
+    CLUSTER_DIR, FEATURES, activate, base_artifact, current_version, list_versions,
+    load_artifact, next_version, write_artifact,
+)
+
+# Weight given to each existing centroid when the first incremental run
+# starts from the original (non mini-batch) model.
+BOOTSTRAP_WEIGHT = 50.0
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[np.ndarray]:
+    if path.lower().endswith(".csv"):
+        reader = pd.read_csv(path, chunksize=chunk_size, usecols=FEATURES)
+    else:
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size)
+    for chunk in reader:
+        rows = chunk[FEATURES].apply(pd.to_numeric, errors="coerce").dropna()
+        if len(rows):
+            yield rows.to_numpy(dtype=np.float64)
+
+
+def start_estimator(parent: Dict, chunk_size: int, seed: int) -> MiniBatchKMeans:
+    model = parent["model"]
+    if isinstance(model, MiniBatchKMeans):
+        return model
+    # First incremental run: seed a MiniBatchKMeans with the served centroids,
+    # each counted as BOOTSTRAP_WEIGHT samples, so early chunks refine rather
+    # than replace them.
+    raw = np.asarray(model.cluster_centers_, dtype=np.float64)
+    estimator = MiniBatchKMeans(
+        n_clusters=len(raw), init=raw, n_init=1, batch_size=chunk_size,
+        reassignment_ratio=0.0, random_state=seed,
+    )
+    estimator.partial_fit(pd.DataFrame(raw, columns=FEATURES), sample_weight=np.full(len(raw), BOOTSTRAP_WEIGHT))
+    return estimator
+
+
+def stable_order(previous: np.ndarray, raw: np.ndarray) -> list:
+    """order[i] is the raw cluster that should be served as id i."""
+    cost = np.linalg.norm(previous[:, None, :] - raw[None, :, :], axis=2)
+    rows, cols = linear_sum_assignment(cost)
+    return [int(c) for _, c in sorted(zip(rows, cols))]
+
+
+def retrain(path: str, chunk_size: int, seed: int, parent_version: str) -> Dict:
+    parent = base_artifact() if parent_version == "base" else load_artifact(parent_version)
+    estimator = start_estimator(parent, chunk_size, seed)
+
+    seen = 0
+    for rows in read_chunks(path, chunk_size):
+        estimator.partial_fit(pd.DataFrame(rows, columns=FEATURES))
+        seen += len(rows)
+        print(f"  {seen} rows", file=sys.stderr)
+    if not seen:
+        raise SystemExit(f"No usable {'/'.join(FEATURES)} rows in {path}")
+
+    previous = np.asarray(parent["centroids"], dtype=np.float64)
+    order = stable_order(previous, estimator.cluster_centers_)
+    centroids = estimator.cluster_centers_[order]
+    for i, (old, new) in enumerate(zip(previous, centroids)):
+        print(f"  {parent['labels'].get(i, i)}: moved {np.linalg.norm(new - old):.2f}")
+
+    return {
+        "version": next_version(),
+        "model": estimator,
+        "order": order,
+        "centroids": centroids,
+        "labels": dict(parent["labels"]),
+        "samples_seen": parent["samples_seen"] + seen,
+        "parent": parent["version"],
+        "source": path,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incrementally retrain the DASS cluster model")
+    parser.add_argument("input", nargs="?", help="CSV or JSONL with stress, anxiety and depression columns")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--parent", help="version to continue from (default: the latest one)")
+    parser.add_argument("--activate", action="store_true", help="serve the new version once written")
+    parser.add_argument("--activate-version", help="serve an existing version (switch or roll back)")
+    parser.add_argument("--list", action="store_true", help="list versions")
+    args = parser.parse_args()
+
+    if args.list:
+        active = current_version() or "base"
+        for version in ["base"] + list_versions():
+            print(("* " if version == active else "  ") + version)
+        return 0
+    if args.activate_version:
+        activate(args.activate_version)
+        print(f"{CLUSTER_DIR / 'CURRENT'} -> {args.activate_version}")
+        return 0
+    if not args.input:
+        parser.error("input is required unless --list or --activate-version is given")
+
+    versions = list_versions()
+    parent = args.parent or (versions[-1] if versions else "base")
+    artifact = retrain(args.input, args.chunk_size, args.seed, parent)
+    path = write_artifact(artifact)
+    print(f"Wrote {path} ({artifact['samples_seen']} samples seen, parent {artifact['parent']})")
+    if args.activate:
+        activate(artifact["version"])
+        print(f"{CLUSTER_DIR / 'CURRENT'} -> {artifact['version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,163 @@
-from fastapi import APIRouter
+import asyncio
+import json
+import uuid
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import joblib
-import re
+from typing import Dict, List, Optional
+from services.executor import inference_pool
+from services.stress_model import score_texts
+from services.speech_to_text import require_transcriber
+from services.voice_stream import VOICE_MAX_SECONDS, VoiceStream, analyze_transcript
 
 router = APIRouter(prefix="/predict-stress")
+stream_router = APIRouter(prefix="/voice")
 
-# Load YOUR model
-model = joblib.load("models/stress_model.pkl")
-vectorizer = joblib.load("models/stress_vectorizer.pkl")
 
 class StressText(BaseModel):
     nickname: str
     text: str
 
-def clean_text(text: str):
-    text = text.lower()
-    text = re.sub(r"[^a-z\s]", "", text)
-    return text
+
+class StressBatchRequest(BaseModel):
+    items: List[StressText]
+
+
+class StressResult(BaseModel):
+    nickname: str
+    stress_level: int
+    probabilities: Optional[Dict[str, float]] = None
+
+
+class StressBatchResponse(BaseModel):
+    model: str
+    results: List[StressResult]
+
+
+MAX_BATCH_ITEMS = 10_000
+
 
 @router.post("/")
 def predict_stress(data: StressText):
-    cleaned = clean_text(data.text)
-    vec = vectorizer.transform([cleaned])
-    prediction = int(model.predict(vec)[0])
+    levels, _ = score_texts([data.text], probabilities=False)
 
     return {
         "model": "stress_model",
         "nickname": data.nickname,
-        "stress_level": prediction
+        "stress_level": levels[0]
     }
+
+
+@router.post("/batch", response_model=StressBatchResponse)
+def predict_stress_batch(payload: StressBatchRequest):
+    if len(payload.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} items per request")
+    if not payload.items:
+        return StressBatchResponse(model="stress_model", results=[])
+    levels, probabilities = score_texts([item.text for item in payload.items])
+    return StressBatchResponse(
+        model="stress_model",
+        results=[
+            StressResult(
+                nickname=item.nickname,
+                stress_level=level,
+                probabilities=probabilities[i] if probabilities else None,
+            )
+            for i, (item, level) in enumerate(zip(payload.items, levels))
+        ],
+    )
+
+
+@stream_router.websocket("/stream")
+async def voice_stream(websocket: WebSocket):
+    """Streaming voice check-in.
+
+    Connect with ``?nickname=...&sample_rate=16000``, send binary frames of
+    16-bit mono PCM while recording and ``{"event": "end"}`` when recording
+    stops. The server answers with ``partial`` events (transcript so far
+    with its stress, emotion and risk) as segments are transcribed, then a
+    ``final`` event and closes the socket.
+    """
+    await websocket.accept()
+    nickname = websocket.query_params.get("nickname", "")
+    key = f"voice:{uuid.uuid4()}"
+    # Analyses run on the bounded inference pool under the client's address,
+    # so they share the per-client limit with /predict-emotion.
+    client_key = websocket.client.host if websocket.client else key
+    try:
+        transcriber = require_transcriber()
+    except HTTPException as exc:
+        await websocket.send_json({"event": "error", "data": {"status": exc.status_code, "detail": exc.detail}})
+        await websocket.close(code=1013)
+        return
+    try:
+        stream = VoiceStream(int(websocket.query_params.get("sample_rate", "16000")))
+    except (ValueError, HTTPException) as exc:
+        await websocket.send_json({"event": "error", "data": {"status": 400, "detail": getattr(exc, "detail", str(exc))}})
+        await websocket.close(code=1003)
+        return
+    source = {"nickname": nickname, "stt_backend": transcriber.name}
+
+    segments: asyncio.Queue = asyncio.Queue()
+
+    async def transcribe_segments():
+        # Segments are transcribed in order, one at a time; the partial
+        # analysis is skipped while newer audio is already waiting or when
+        # the pool turns it away (the final analysis covers it).
+        try:
+            while (segment := await segments.get()) is not None:
+                text = await run_in_threadpool(stream.transcribe_segment, segment)
+                if text and segments.empty():
+                    try:
+                        partial = await inference_pool.run(analyze_transcript, stream.transcript, key, client_key=client_key)
+                    except HTTPException:
+                        continue
+                    await websocket.send_json({"event": "partial", "data": {**source, **partial}})
+        except (HTTPException, WebSocketDisconnect, asyncio.CancelledError):
+            raise
+        except Exception as exc:
+            print(f"Voice transcription failed: {exc!r}")
+            raise HTTPException(status_code=500, detail="Transcription failed") from exc
+
+    worker = asyncio.create_task(transcribe_segments())
+    try:
+        while True:
+            # The worker only stops before "end" when it failed; report that
+            # now instead of after the rest of the recording.
+            if worker.done():
+                await worker
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                for segment in stream.feed(message["bytes"]):
+                    segments.put_nowait(segment)
+                if stream.duration_s > VOICE_MAX_SECONDS:
+                    raise HTTPException(status_code=413, detail=f"Recordings are limited to {VOICE_MAX_SECONDS:.0f} seconds")
+            elif message.get("text"):
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except (ValueError, AttributeError):
+                    event = None
+                if event == "end":
+                    break
+
+        segments.put_nowait(stream.flush())
+        segments.put_nowait(None)
+        await worker
+        final = dict.fromkeys(
+            ("stress_level", "stress_probabilities", "emotion", "emotion_score", "risk_level"), None
+        )
+        final["transcript"] = stream.transcript
+        if stream.transcript:
+            final = await inference_pool.run(analyze_transcript, stream.transcript, key, client_key=client_key)
+        await websocket.send_json(
+            {"event": "final", "data": {**source, "duration_s": round(stream.duration_s, 2), **final}}
+        )
+        await websocket.close()
+    except WebSocketDisconnect:
+        worker.cancel()
+    except HTTPException as exc:
+        worker.cancel()
+        await websocket.send_json({"event": "error", "data": {"status": exc.status_code, "detail": exc.detail}})
+        await websocket.close(code=1011)
@@ -0,0 +1,69 @@
+import os
+import threading
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+
+# -----------------------------------------------------------
+# FIREBASE AUTHENTICATION
+# -----------------------------------------------------------
+# Routes that store or return a user's own data (the heatmap rollups) take
+# the user id from a verified Firebase ID token, never from the path or the
+# body. The app sends ``Authorization: Bearer <idToken>`` from
+# ``auth.currentUser.getIdToken()``; the token's signature, expiry, audience
+# and issuer (both FIREBASE_PROJECT_ID) are checked with google-auth against
+# Google's public keys, which are cached for as long as Google allows
+# (`pip install google-auth requests cachecontrol`). Without the project id
+# or those packages the routes answer 503 rather than trusting the caller.
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "")
+
+_request = None
+_request_lock = threading.Lock()
+
+
+def _auth_request():
+    global _request
+    if _request is None:
+        with _request_lock:
+            if _request is None:
+                import cachecontrol
+                import requests
+                from google.auth.transport.requests import Request
+
+                _request = Request(session=cachecontrol.CacheControl(requests.Session()))
+    return _request
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def current_user_id(authorization: Optional[str] = Header(None)) -> str:
+    """FastAPI dependency: the uid of the verified Firebase ID token."""
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _unauthorized("Missing bearer token")
+    if not FIREBASE_PROJECT_ID:
+        raise HTTPException(status_code=503, detail="Authentication is not configured (FIREBASE_PROJECT_ID)")
+    try:
+        from google.auth import exceptions
+        from google.oauth2 import id_token
+
+        request = _auth_request()
+    except ImportError:
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is not available (pip install google-auth requests cachecontrol)",
+        )
+
+    try:
+        claims = id_token.verify_firebase_token(token, request, audience=FIREBASE_PROJECT_ID)
+    except exceptions.TransportError:
+        raise HTTPException(status_code=503, detail="Could not fetch token signing keys, please retry")
+    except ValueError:
+        raise _unauthorized("Invalid or expired token")
+    if claims.get("iss") != f"https://securetoken.google.com/{FIREBASE_PROJECT_ID}" or not claims.get("sub"):
+        raise _unauthorized("Invalid or expired token")
+    return claims["sub"]
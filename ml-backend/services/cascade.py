@@ -0,0 +1,85 @@
+import os
+import threading
+from typing import Dict, FrozenSet, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.metrics import metrics
+from services.stress_model import stress_proba
+
+
+# -----------------------------------------------------------
+# CONFIDENCE-GATED CASCADE (OPTIONAL)
+# -----------------------------------------------------------
+# With EMOTION_CASCADE=on, /chatbot/analyze, the chat routes and
+# /emotion/predict first score a text with the TF-IDF stress model and the
+# keyword heuristics. A text is answered without the transformer only when
+# it is unambiguous: no keyword category fires, the risk check is "safe"
+# and the stress model gives the low-stress class at least
+# CASCADE_LOW_STRESS_THRESHOLD. Such texts are reported as "neutral" with
+# that probability as confidence. Everything else goes to the transformer.
+#
+# The sparse model cannot tell sadness from fear or anger, so it never
+# answers a negative text on its own; it only saves the transformer pass for
+# calm, everyday check-ins.
+CASCADE_ENABLED = os.getenv("EMOTION_CASCADE", "off").lower() in ("1", "on", "true")
+CASCADE_LOW_STRESS_THRESHOLD = float(os.getenv("CASCADE_LOW_STRESS_THRESHOLD", "0.85"))
+CASCADE_LOW_STRESS_CLASS = int(os.getenv("CASCADE_LOW_STRESS_CLASS", "0"))
+CASCADE_LABEL = "neutral"
+
+CASCADE_ANSWERS = metrics.counter(
+    "mindplus_cascade_answers_total", "Texts answered by each cascade stage (sparse model or transformer)."
+)
+
+
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"sparse": 0, "transformer": 0}
+
+    def record(self, stage: str, route: str) -> None:
+        with self._lock:
+            self.counts[stage] += 1
+        CASCADE_ANSWERS.inc(stage=stage, route=route)
+
+    def stats(self) -> Dict:
+        total = sum(self.counts.values())
+        return {
+            "enabled": CASCADE_ENABLED,
+            "low_stress_threshold": CASCADE_LOW_STRESS_THRESHOLD,
+            **{f"{stage}_answers": count for stage, count in self.counts.items()},
+            "sparse_share": (self.counts["sparse"] / total) if total else 0.0,
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+def sparse_stage(text: str, hits: FrozenSet[str], risk: str, route: str) -> Optional[Dict]:
+    """Answer ``text`` from the cheap stage, or return None to escalate.
+
+    The result has the same shape as the transformer's (``label``,
+    ``score``, ``scores``). Escalations are counted here too, so callers
+    only need to run the transformer when this returns None.
+    """
+
+    if not CASCADE_ENABLED:
+        return None
+    if hits or risk != "safe":
+        cascade_stats.record("transformer", route)
+        return None
+    try:
+        classes, proba = stress_proba([text])
+    except HTTPException:
+        # stress model still loading
+        cascade_stats.record("transformer", route)
+        return None
+
+    matches = np.flatnonzero(classes == CASCADE_LOW_STRESS_CLASS)
+    p_low = float(proba[0, matches[0]]) if len(matches) else 0.0
+    if p_low < CASCADE_LOW_STRESS_THRESHOLD:
+        cascade_stats.record("transformer", route)
+        return None
+    cascade_stats.record("sparse", route)
+    return {"label": CASCADE_LABEL, "score": p_low, "scores": {CASCADE_LABEL: p_low}}
@@ -1,23 +1,17 @@
-import os
-os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
-os.environ["HF_HUB_DISABLE_SYMLINKS"] = "1"
-
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from typing import List, Dict
+from concurrent.futures import Future
+from typing import List, Dict, FrozenSet, Iterator, Optional
 import uuid
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-
-
-# -----------------------------------------------------------
-# MODEL LOAD
-# -----------------------------------------------------------
-MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
-print("Loading model... Please wait...")
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-print("Model loaded successfully!")
+import json
+import threading
+from services.inference_scheduler import scheduler
+from services.cascade import sparse_stage
+from services.degradation import degradation, DEGRADED_RESPONSES
+from services.session_store import build_session_store
+from services.metrics import stage_timer
+from utils.keyword_matcher import KeywordMatcher
 
 
 # -----------------------------------------------------------
@@ -35,6 +29,7 @@ class AnalysisResult(BaseModel):
     risk_level: str
     overall_status: str
     bot_response: str
+    degraded: bool = False
 
 
 class ChatStartResponse(BaseModel):
@@ -54,6 +49,7 @@ class ChatMessageResponse(BaseModel):
     risk_level: str
     overall_status: str
     techniques: List[str]
+    degraded: bool = False
 
 
 # -----------------------------------------------------------
@@ -67,85 +63,149 @@ def emotion_to_stress(emotion: str) -> str:
     return "low"
 
 
+# -----------------------------------------------------------
+# KEYWORD HEURISTICS
+# -----------------------------------------------------------
+# All keyword lists are compiled once into a single matcher. Each message
+# is scanned once and the detectors below read the category hits.
+ACADEMIC_HIGH_KEYWORDS = [
+    "overwhelmed",
+    "can't handle",
+    "hopeless",
+    "panic",
+    "breakdown",
+    "giving up",
+    "end it",
+    "crisis",
+]
+ACADEMIC_MEDIUM_KEYWORDS = [
+    "stressed",
+    "pressure",
+    "anxious",
+    "worried",
+    "tired",
+    "frustrated",
+    "behind",
+    "can't focus",
+    "cant focus",
+    "procrastinating",
+    "procrastination",
+]
+BURNOUT_KEYWORDS = [
+    "burnout",
+    "burnt out",
+    "exhausted",
+    "drained",
+    "no energy",
+    "fatigued",
+    "done with everything",
+]
+ACADEMIC_KEYWORDS = [
+    "exam",
+    "exams",
+    "midterm",
+    "final",
+    "quiz",
+    "assignment",
+    "assignments",
+    "deadline",
+    "due",
+    "project",
+    "thesis",
+    "dissertation",
+    "university",
+    "college",
+    "school",
+    "lectures",
+    "lecture",
+    "coursework",
+    "gpa",
+    "grades",
+    "mark",
+    "marks",
+    "study",
+    "studies",
+    "studying",
+]
+
+HIGH_RISK_KEYWORDS = ["suicide", "kill myself", "end my life", "i want to die", "no reason to live", "end it all"]
+MEDIUM_RISK_KEYWORDS = ["hopeless", "worthless", "nothing matters", "empty inside"]
+
+ALL_OR_NOTHING_PATTERNS = ["always", "never", "completely fail", "ruined everything"]
+CATASTROPHIZING_PATTERNS = ["disaster", "ruined", "no way out", "everything will go wrong"]
+MIND_READING_PATTERNS = ["everyone thinks", "they all think", "people will think"]
+SELF_CRITICISM_PATTERNS = ["i'm useless", "i am useless", "i'm stupid", "i am stupid", "i'm a failure", "i am a failure"]
+
+THEME_ACADEMIC_TERMS = [
+    "exam",
+    "assignment",
+    "lecture",
+    "school",
+    "university",
+    "college",
+    "gpa",
+    "grade",
+    "project",
+    "thesis",
+    "study",
+    "studying",
+]
+THEME_RELATIONSHIP_TERMS = [
+    "friend",
+    "friends",
+    "relationship",
+    "partner",
+    "boyfriend",
+    "girlfriend",
+    "family",
+    "parents",
+    "mom",
+    "dad",
+]
+THEME_WORK_TERMS = ["job", "work", "shift", "boss", "office"]
+
+keyword_matcher = KeywordMatcher({
+    "academic_high": ACADEMIC_HIGH_KEYWORDS,
+    "academic_medium": ACADEMIC_MEDIUM_KEYWORDS,
+    "burnout": BURNOUT_KEYWORDS,
+    "academic": ACADEMIC_KEYWORDS,
+    "risk_high": HIGH_RISK_KEYWORDS,
+    "risk_medium": MEDIUM_RISK_KEYWORDS,
+    "cbt_all_or_nothing": ALL_OR_NOTHING_PATTERNS,
+    "cbt_catastrophizing": CATASTROPHIZING_PATTERNS,
+    "cbt_mind_reading": MIND_READING_PATTERNS,
+    "cbt_self_criticism": SELF_CRITICISM_PATTERNS,
+    "theme_studies": THEME_ACADEMIC_TERMS,
+    "theme_relationships": THEME_RELATIONSHIP_TERMS,
+    "theme_work": THEME_WORK_TERMS,
+})
+
+
+def scan_keywords(text: str) -> FrozenSet[str]:
+    """Return every keyword category found in ``text``."""
+    return keyword_matcher.scan(text)
+
+
 # -----------------------------------------------------------
 # ACADEMIC STRESS DETECTOR
 # -----------------------------------------------------------
-def academic_stress_classifier(text: str, emotion: str) -> str:
+def academic_stress_classifier(text: str, emotion: str, hits: FrozenSet[str] | None = None) -> str:
     """Heuristic classifier focused on academic / study stress.
 
     Combines simple keyword spotting with the detected emotion.
     """
 
-    t = text.lower()
-
-    high_k = [
-        "overwhelmed",
-        "can't handle",
-        "hopeless",
-        "panic",
-        "breakdown",
-        "giving up",
-        "end it",
-        "crisis",
-    ]
-    med_k = [
-        "stressed",
-        "pressure",
-        "anxious",
-        "worried",
-        "tired",
-        "frustrated",
-        "behind",
-        "can't focus",
-        "cant focus",
-        "procrastinating",
-        "procrastination",
-    ]
-    burnout_k = [
-        "burnout",
-        "burnt out",
-        "exhausted",
-        "drained",
-        "no energy",
-        "fatigued",
-        "done with everything",
-    ]
-    academic_k = [
-        "exam",
-        "exams",
-        "midterm",
-        "final",
-        "quiz",
-        "assignment",
-        "assignments",
-        "deadline",
-        "due",
-        "project",
-        "thesis",
-        "dissertation",
-        "university",
-        "college",
-        "school",
-        "lectures",
-        "lecture",
-        "coursework",
-        "gpa",
-        "grades",
-        "mark",
-        "marks",
-        "study",
-        "studies",
-        "studying",
-    ]
-
-    if any(w in t for w in high_k):
+    if hits is None:
+        hits = scan_keywords(text)
+
+    if "academic_high" in hits:
         return "academic_stress_high"
-    if any(w in t for w in burnout_k):
+    if "burnout" in hits:
         return "burnout"
-    if any(w in t for w in med_k):
+    if "academic_medium" in hits:
         return "academic_stress_medium"
 
-    if any(w in t for w in academic_k):
+    if "academic" in hits:
         if emotion in ["fear", "sadness", "anger"]:
             return "academic_stress_high"
         if emotion == "surprise":
@@ -161,15 +221,13 @@ def academic_stress_classifier(text: str, emotion: str) -> str:
 # -----------------------------------------------------------
 # RISK DETECTOR
 # -----------------------------------------------------------
-def risk_detector(text: str) -> str:
-    t = text.lower()
-
-    high_risk = ["suicide", "kill myself", "end my life", "i want to die", "no reason to live", "end it all"]
-    med_risk = ["hopeless", "worthless", "nothing matters", "empty inside"]
+def risk_detector(text: str, hits: FrozenSet[str] | None = None) -> str:
+    if hits is None:
+        hits = scan_keywords(text)
 
-    if any(w in t for w in high_risk):
+    if "risk_high" in hits:
         return "high_risk"
-    if any(w in t for w in med_risk):
+    if "risk_medium" in hits:
         return "moderate_risk"
     return "safe"
 
@@ -268,50 +326,82 @@ def suggest_techniques(emotion: str, academic_stress: str) -> List[str]:
 # -----------------------------------------------------------
 # THERAPEUTIC REPLY (SESSION MODE)
 # -----------------------------------------------------------
-def _classify_theme_from_history(history: List[Dict[str, str]], latest_text: str) -> str:
-    """Roughly classify what the user is talking about (studies, relationships, life)."""
+THEME_CATEGORIES = ("theme_studies", "theme_relationships", "theme_work")
+
 
-    combined = " ".join(m.get("message", "") for m in history if m.get("role") == "user")
-    combined += " " + latest_text
-    t = combined.lower()
-
-    academic_terms = [
-        "exam",
-        "assignment",
-        "lecture",
-        "school",
-        "university",
-        "college",
-        "gpa",
-        "grade",
-        "project",
-        "thesis",
-        "study",
-        "studying",
-    ]
-    relationship_terms = [
-        "friend",
-        "friends",
-        "relationship",
-        "partner",
-        "boyfriend",
-        "girlfriend",
-        "family",
-        "parents",
-        "mom",
-        "dad",
-    ]
-    work_terms = ["job", "work", "shift", "boss", "office"]
-
-    if any(w in t for w in academic_terms):
+def _theme_from_hits(hits) -> str:
+    if "theme_studies" in hits:
         return "studies"
-    if any(w in t for w in relationship_terms):
+    if "theme_relationships" in hits:
         return "relationships"
-    if any(w in t for w in work_terms):
+    if "theme_work" in hits:
         return "work"
     return "general"
 
 
+def _classify_theme_from_history(
+    history: List[Dict[str, str]], latest_text: str, latest_hits: FrozenSet[str] | None = None
+) -> str:
+    """Roughly classify what the user is talking about (studies, relationships, life)."""
+
+    hits = set(latest_hits if latest_hits is not None else scan_keywords(latest_text))
+    for m in history:
+        if m.get("role") == "user":
+            hits |= scan_keywords(m.get("message", ""))
+    return _theme_from_hits(hits)
+
+
+# -----------------------------------------------------------
+# RUNNING SESSION STATE
+# -----------------------------------------------------------
+# Counters kept per session and updated once per user turn, so building a
+# reply never has to walk or rescan the whole conversation.
+def new_session_state() -> Dict:
+    return {
+        "user_turns": 0,
+        "theme_hits": {},
+        "emotion_counts": {},
+        "stress_counts": {},
+    }
+
+
+def update_session_state(state: Dict, hits: FrozenSet[str], emotion: str, stress: str) -> None:
+    state["user_turns"] += 1
+    for category in THEME_CATEGORIES:
+        if category in hits:
+            state["theme_hits"][category] = state["theme_hits"].get(category, 0) + 1
+    if emotion not in (PENDING_EMOTION, DEGRADED_EMOTION):
+        _record_emotion(state, emotion, stress)
+
+
+def _record_emotion(state: Dict, emotion: str, stress: str) -> None:
+    state["emotion_counts"][emotion] = state["emotion_counts"].get(emotion, 0) + 1
+    state["stress_counts"][stress] = state["stress_counts"].get(stress, 0) + 1
+
+
+# Turns and late (background) emotions update a session by read, modify,
+# save; a striped lock per session id keeps one from overwriting the other.
+_SESSION_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _session_lock(session_id: str) -> threading.Lock:
+    return _SESSION_LOCKS[hash(session_id) % len(_SESSION_LOCKS)]
+
+
+def _record_background_emotion(session_id: str, fut: Future) -> None:
+    """Done-callback of a high-risk turn's background classification: count
+    its emotion in the session once the model has answered."""
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    label = fut.result()["label"]
+    with _session_lock(session_id):
+        session = Sessions.get(session_id)
+        if session is None:
+            return
+        _record_emotion(session["state"], label, emotion_to_stress(label))
+        Sessions.save(session_id, session)
+
+
 def _build_reflection_sentence(text: str, emotion: str, academic_stress: str, theme: str) -> str:
     base = "Thank you for trusting me with this. "
 
@@ -359,7 +449,7 @@ def _build_followup_question(turns: int, risk: str, academic_stress: str) -> str
     return " What is one small change that, if it happened, would make this even slightly easier to carry?"
 
 
-def _detect_cbt_pattern(text: str) -> str | None:
+def _detect_cbt_pattern(text: str, hits: FrozenSet[str] | None = None) -> str | None:
     """Very simple CBT-style helper.
 
     Looks for common thinking patterns and returns a gentle
@@ -367,32 +457,28 @@ def _detect_cbt_pattern(text: str) -> str | None:
     clinical tool, just a conversational aid.
     """
 
-    t = text.lower()
-
-    all_or_nothing = ["always", "never", "completely fail", "ruined everything"]
-    catastrophizing = ["disaster", "ruined", "no way out", "everything will go wrong"]
-    mind_reading = ["everyone thinks", "they all think", "people will think"]
-    self_criticism = ["i'm useless", "i am useless", "i'm stupid", "i am stupid", "i'm a failure", "i am a failure"]
+    if hits is None:
+        hits = scan_keywords(text)
 
-    if any(p in t for p in self_criticism):
+    if "cbt_self_criticism" in hits:
         return (
             "I also notice some very harsh thoughts about yourself. In CBT we might gently question "
             "those thoughts and ask: if a close friend were in your situation, would you judge them as harshly? "
         )
 
-    if any(p in t for p in all_or_nothing):
+    if "cbt_all_or_nothing" in hits:
         return (
             "It sounds like your mind is pulling things into all-or-nothing terms. A small CBT step is to look for "
             "examples that don't fully fit the 'always/never' story, even if they feel small. "
         )
 
-    if any(p in t for p in catastrophizing):
+    if "cbt_catastrophizing" in hits:
         return (
             "Some of what you wrote sounds like your mind is jumping to the worst-case scenario. "
             "A CBT-style question here is: what is the most realistic outcome, and what evidence supports it? "
         )
 
-    if any(p in t for p in mind_reading):
+    if "cbt_mind_reading" in hits:
         return (
             "You mentioned worrying about what others think. In CBT this is sometimes called 'mind-reading'— "
             "assuming we know others' thoughts without clear evidence. It can help to pause and ask what you actually know for sure. "
@@ -401,39 +487,55 @@ def _detect_cbt_pattern(text: str) -> str | None:
     return None
 
 
-def generate_therapeutic_reply(
+def iter_therapeutic_reply_parts(
     text: str,
     emotion: str,
     stress: str,
     academic_stress: str,
     risk: str,
     history: List[Dict[str, str]],
+    hits: FrozenSet[str] | None = None,
+    state: Dict | None = None,
 ):
-    """Generate a supportive, stress-focused reply using simple rules.
+    """Yield the reply piece by piece, in the order it is read.
 
-    This function is intentionally conservative: it offers validation,
-    coping strategies and gentle reflection, and defers to real-world
-    help for any high-risk situations.
+    Each part is ``{"part": name, "text": ...}``; the techniques part also
+    carries the ``techniques`` list. Joining every ``text`` gives the full
+    bot message, which lets the streaming routes send each part as soon as
+    it is built.
     """
 
     # High-risk: prioritise safety messaging and do not try to "fix" things
     if risk == "high_risk":
-        return {
-            "bot_message": (
+        yield {
+            "part": "safety",
+            "text": (
                 "I'm really glad you shared this with me. Your safety matters more than anything. "
                 "I'm an AI and I can't provide emergency help, but I care about your wellbeing. "
                 "If you feel like you might harm yourself or are in immediate danger, please contact "
                 "emergency services or a crisis hotline in your country right now. "
                 "You don't have to face this alone."
             ),
+        }
+        yield {
+            "part": "techniques",
+            "text": "",
             "techniques": [
                 "Call emergency services",
                 "Contact someone you trust",
             ],
         }
+        return
 
-    turns = sum(1 for m in history if m.get("role") == "user")
-    theme = _classify_theme_from_history(history, text)
+    if hits is None:
+        hits = scan_keywords(text)
+
+    if state is not None:
+        turns = state["user_turns"]
+        theme = _theme_from_hits(hits | set(state["theme_hits"]))
+    else:
+        turns = sum(1 for m in history if m.get("role") == "user")
+        theme = _classify_theme_from_history(history, text, hits)
 
     # ChatGPT-like greeting on the very first turn
     greeting = ""
@@ -442,6 +544,7 @@ def generate_therapeutic_reply(
             "Hi, I'm MindPlus, an AI companion focused on stress, emotions, and academic pressure. "
             "I can't replace a human professional, but I can help you explore what you're feeling and suggest coping ideas. "
         )
+        yield {"part": "greeting", "text": greeting}
 
     reflection = _build_reflection_sentence(text, emotion, academic_stress, theme)
 
@@ -452,8 +555,7 @@ def generate_therapeutic_reply(
     else:
         tone = "Even if things seem okay from the outside, it's valid to want support. "
 
-    # Simple CBT-style line (optional)
-    cbt_line = _detect_cbt_pattern(text) or ""
+    yield {"part": "reflection", "text": reflection + tone}
 
     # Academic-ready short explanation of the classification
     overall = overall_status_engine(emotion, stress, academic_stress, risk)
@@ -462,6 +564,12 @@ def generate_therapeutic_reply(
         f"'{overall}' overall with '{academic_stress}' related to your studies. "
         "This is just an automated approximation, not a diagnosis. "
     )
+    yield {"part": "classification", "text": academic_expl}
+
+    # Simple CBT-style line (optional)
+    cbt_line = _detect_cbt_pattern(text, hits)
+    if cbt_line:
+        yield {"part": "cbt", "text": cbt_line}
 
     techniques = suggest_techniques(emotion, academic_stress)
     technique_line = (
@@ -469,29 +577,152 @@ def generate_therapeutic_reply(
         + ", ".join(techniques)
         + ". "
     )
+    yield {"part": "techniques", "text": technique_line, "techniques": techniques}
 
-    followup = _build_followup_question(turns, risk, academic_stress)
+    yield {"part": "followup", "text": _build_followup_question(turns, risk, academic_stress)}
 
-    bot_message = greeting + reflection + tone + academic_expl + cbt_line + technique_line + followup
 
+def generate_therapeutic_reply(
+    text: str,
+    emotion: str,
+    stress: str,
+    academic_stress: str,
+    risk: str,
+    history: List[Dict[str, str]],
+    hits: FrozenSet[str] | None = None,
+    state: Dict | None = None,
+):
+    """Generate a supportive, stress-focused reply using simple rules.
+
+    This function is intentionally conservative: it offers validation,
+    coping strategies and gentle reflection, and defers to real-world
+    help for any high-risk situations.
+
+    When the running session ``state`` is given, turn count and theme come
+    from its counters and ``history`` is not scanned.
+    """
+
+    parts = list(iter_therapeutic_reply_parts(text, emotion, stress, academic_stress, risk, history, hits, state))
+    bot_message = "".join(p["text"] for p in parts)
+    techniques = next((p["techniques"] for p in parts if "techniques" in p), [])
     return {"bot_message": bot_message, "techniques": techniques}
 
 
 # -----------------------------------------------------------
-# IN-MEMORY SESSION STORE
+# SESSION STORE
 # -----------------------------------------------------------
-Sessions: Dict[str, List[Dict[str, str]]] = {}
+# Each session keeps its message history plus the running state above.
+# See services/session_store.py for expiry, limits and backends.
+Sessions = build_session_store()
 
 
 # -----------------------------------------------------------
 # SERVICE FUNCTIONS
 # -----------------------------------------------------------
 
+def screen_risk(text: str) -> tuple[FrozenSet[str], str]:
+    """Keyword scan and risk level; cheap enough to run before inference."""
+    with stage_timer("keyword_scan"):
+        hits = scan_keywords(text)
+    with stage_timer("risk_detector"):
+        risk = risk_detector(text, hits)
+    return hits, risk
+
+
+def is_high_risk(text: str) -> bool:
+    return risk_detector(text.strip()) == "high_risk"
+
+
+def run_keyword_heuristics(
+    text: str, emotion: str, screened: tuple[FrozenSet[str], str] | None = None
+) -> tuple[FrozenSet[str], str, str]:
+    hits, risk = screened or screen_risk(text)
+    with stage_timer("academic_stress_classifier"):
+        academic_stress = academic_stress_classifier(text, emotion, hits)
+    return hits, academic_stress, risk
+
+
+# -----------------------------------------------------------
+# RISK-FIRST LANE
+# -----------------------------------------------------------
+# The risk check runs before the transformer. A high-risk message does not
+# wait for the emotion model at all: it gets the safety reply straight away
+# with emotion "pending". In a chat its classification is queued in the
+# background and a done-callback counts it in the session once the model
+# has answered; /chatbot/analyze has no session to keep it in, so it does
+# not queue one.
+#
+# Under overload (see services/degradation.py) every message skips the
+# transformer: the emotion is "unknown" and the response is marked degraded.
+# The routes decide that once per request (they also use it to pick the
+# thread the service runs on) and pass it in as ``degraded``; None checks
+# the controller here.
+PENDING_EMOTION = "pending"
+DEGRADED_EMOTION = "unknown"
+
+
+def _classify_in_background(text: str, key: str) -> Optional[Future]:
+    try:
+        return scheduler.submit(text, key)
+    except HTTPException:
+        return None  # model still loading; the safety reply does not depend on it
+
+
+def _classify_risk_first(
+    text: str, key: str, route: str, degraded: Optional[bool] = None, background: bool = False
+) -> tuple[str, FrozenSet[str], str, Optional[Future]]:
+    """Return ``(emotion, hits, risk, background)``, skipping inference for
+    high risk, under overload and, in cascade mode, for texts the sparse
+    stage can answer. With ``background`` set the classification of a
+    high-risk text is queued and returned; otherwise it is None."""
+    hits, risk = screen_risk(text)
+    if risk == "high_risk":
+        return PENDING_EMOTION, hits, risk, _classify_in_background(text, key) if background else None
+    if degradation.active() if degraded is None else degraded:
+        DEGRADED_RESPONSES.inc(route=route)
+        return DEGRADED_EMOTION, hits, risk, None
+    cheap = sparse_stage(text, hits, risk, route)
+    if cheap is not None:
+        return cheap["label"], hits, risk, None
+    return scheduler.classify(text, key)["label"], hits, risk, None
+
+
 def health_service() -> Dict[str, str]:
     return {"status": "ok"}
 
 
-def analyze_text_service(input: TextInput) -> AnalysisResult:
+def session_stats_service() -> Dict:
+    return Sessions.stats()
+
+
+def _stress_level(emotion: str, risk: str) -> str:
+    """Stress from the emotion, or from the risk check when there is none."""
+    if emotion in (PENDING_EMOTION, DEGRADED_EMOTION):
+        return {"high_risk": "high", "moderate_risk": "medium"}.get(risk, "low")
+    return emotion_to_stress(emotion)
+
+
+def build_analysis(
+    text: str, emotion: str, screened: tuple[FrozenSet[str], str] | None = None
+) -> AnalysisResult:
+    """Everything /chatbot/analyze derives once the emotion label is known."""
+    hits, academic_stress, risk = run_keyword_heuristics(text, emotion, screened)
+    stress = _stress_level(emotion, risk)
+    overall = overall_status_engine(emotion, stress, academic_stress, risk)
+    bot_response = generate_response(overall, emotion, academic_stress, risk)
+
+    return AnalysisResult(
+        emotion=emotion,
+        stress_level=stress,
+        academic_stress_category=academic_stress,
+        risk_level=risk,
+        overall_status=overall,
+        bot_response=bot_response,
+        degraded=emotion == DEGRADED_EMOTION,
+    )
+
+
+def analyze_text_service(input: TextInput, degraded: Optional[bool] = None) -> AnalysisResult:
     try:
         user_id = input.user_id
         text = input.text.strip()
@@ -499,29 +730,8 @@ def analyze_text_service(input: TextInput) -> AnalysisResult:
         if not text:
             raise HTTPException(status_code=400, detail="Text cannot be empty")
 
-        with torch.no_grad():
-            tokens = tokenizer(text, return_tensors="pt", truncation=True, max_length=256)
-            outputs = model(**tokens)
-            probs = torch.softmax(outputs.logits, dim=1)
-            emotion = model.config.id2label[int(torch.argmax(probs))]
-
-        stress = emotion_to_stress(emotion)
-        academic_stress = academic_stress_classifier(text, emotion)
-        risk = risk_detector(text)
-        overall = overall_status_engine(emotion, stress, academic_stress, risk)
-        bot_response = generate_response(overall, emotion, academic_stress, risk)
-
-        analysis = AnalysisResult(
-            emotion=emotion,
-            stress_level=stress,
-            academic_stress_category=academic_stress,
-            risk_level=risk,
-            overall_status=overall,
-            bot_response=bot_response,
-        )
-
-        # user_id is currently unused but kept for future extension
-        _ = user_id
+        emotion, hits, risk, _ = _classify_risk_first(text, user_id, "analyze", degraded)
+        analysis = build_analysis(text, emotion, (hits, risk))
 
         return analysis
 
@@ -533,51 +743,142 @@ def analyze_text_service(input: TextInput) -> AnalysisResult:
 
 def chat_start_service() -> ChatStartResponse:
     session_id = str(uuid.uuid4())
-    Sessions[session_id] = []
+    Sessions.create(session_id, {"history": [], "state": new_session_state()})
     return ChatStartResponse(session_id=session_id)
 
 
-def chat_message_service(input: ChatMessageInput) -> ChatMessageResponse:
-    try:
-        session_id = input.session_id
-        text = input.text.strip()
+def prepare_chat_turn(input: ChatMessageInput, degraded: Optional[bool] = None) -> Dict:
+    """Validate a chat message and run the classification step of the turn."""
 
-        if session_id not in Sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
+    session_id = input.session_id
+    text = input.text.strip()
 
-        if not text:
-            raise HTTPException(status_code=400, detail="Text cannot be empty")
+    session = Sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    if not text:
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+
+    emotion, hits, risk, background = _classify_risk_first(text, session_id, "chat", degraded, background=True)
+
+    stress = _stress_level(emotion, risk)
+    hits, academic_stress, risk = run_keyword_heuristics(text, emotion, (hits, risk))
+
+    overall = overall_status_engine(emotion, stress, academic_stress, risk)
+
+    return {
+        "session_id": session_id,
+        "session": session,
+        "text": text,
+        "hits": hits,
+        "emotion": emotion,
+        "stress": stress,
+        "academic_stress": academic_stress,
+        "risk": risk,
+        "overall": overall,
+        "background": background,
+    }
+
+
+def complete_chat_turn(turn: Dict, bot_message: str, techniques: List[str]) -> ChatMessageResponse:
+    """Record the turn in the session and build the response."""
+
+    session_id = turn["session_id"]
+    with _session_lock(session_id):
+        # Re-read so a background emotion recorded during this turn is kept.
+        session = Sessions.get(session_id) or turn["session"]
+        session["history"].append({"role": "user", "message": turn["text"]})
+        session["history"].append({"role": "bot", "message": bot_message})
+        update_session_state(session["state"], turn["hits"], turn["emotion"], turn["stress"])
+        Sessions.save(session_id, session)
+    if turn["background"] is not None:
+        turn["background"].add_done_callback(lambda fut: _record_background_emotion(session_id, fut))
+
+    return ChatMessageResponse(
+        bot_message=bot_message,
+        emotion=turn["emotion"],
+        stress_level=turn["stress"],
+        academic_stress_category=turn["academic_stress"],
+        risk_level=turn["risk"],
+        overall_status=turn["overall"],
+        techniques=techniques,
+        degraded=turn["emotion"] == DEGRADED_EMOTION,
+    )
 
-        with torch.no_grad():
-            tokens = tokenizer(text, return_tensors="pt", truncation=True, max_length=256)
-            outputs = model(**tokens)
-            emotion = model.config.id2label[int(torch.argmax(torch.softmax(outputs.logits, dim=1)))]
-
-        stress = emotion_to_stress(emotion)
-        academic_stress = academic_stress_classifier(text, emotion)
-        risk = risk_detector(text)
-
-        overall = overall_status_engine(emotion, stress, academic_stress, risk)
-
-        history = Sessions.get(session_id, [])
-        reply = generate_therapeutic_reply(text, emotion, stress, academic_stress, risk, history)
-        bot_message = reply["bot_message"]
-        techniques = reply["techniques"]
-
-        Sessions[session_id].append({"role": "user", "message": text})
-        Sessions[session_id].append({"role": "bot", "message": bot_message})
-
-        return ChatMessageResponse(
-            bot_message=bot_message,
-            emotion=emotion,
-            stress_level=stress,
-            academic_stress_category=academic_stress,
-            risk_level=risk,
-            overall_status=overall,
-            techniques=techniques,
-        )
+
+def chat_message_service(input: ChatMessageInput, degraded: Optional[bool] = None) -> ChatMessageResponse:
+    try:
+        turn = prepare_chat_turn(input, degraded)
+        session = turn["session"]
+        with stage_timer("reply_assembly"):
+            reply = generate_therapeutic_reply(
+                turn["text"],
+                turn["emotion"],
+                turn["stress"],
+                turn["academic_stress"],
+                turn["risk"],
+                session["history"],
+                turn["hits"],
+                session["state"],
+            )
+        return complete_chat_turn(turn, reply["bot_message"], reply["techniques"])
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {e}")
+
+
+# -----------------------------------------------------------
+# STREAMING CHAT
+# -----------------------------------------------------------
+def iter_chat_turn_events(turn: Dict) -> Iterator[Dict]:
+    """Events for one prepared turn, produced as they are sent.
+
+    The classification goes out first, then each part of the reply as soon
+    as it is built, then the complete ``ChatMessageResponse`` as ``done``.
+    The turn is recorded in the session only after the last part, so a
+    client that drops mid-reply does not leave half a turn behind. A failure
+    after the stream has started ends it with an ``error`` event.
+    """
+
+    yield {
+        "event": "classification",
+        "data": {
+            "emotion": turn["emotion"],
+            "stress_level": turn["stress"],
+            "academic_stress_category": turn["academic_stress"],
+            "risk_level": turn["risk"],
+            "overall_status": turn["overall"],
+            "degraded": turn["emotion"] == DEGRADED_EMOTION,
+        },
+    }
+
+    try:
+        session = turn["session"]
+        texts: List[str] = []
+        techniques: List[str] = []
+        for part in iter_therapeutic_reply_parts(
+            turn["text"],
+            turn["emotion"],
+            turn["stress"],
+            turn["academic_stress"],
+            turn["risk"],
+            session["history"],
+            turn["hits"],
+            session["state"],
+        ):
+            texts.append(part["text"])
+            techniques = part.get("techniques", techniques)
+            yield {"event": "reply", "data": part}
+
+        response = complete_chat_turn(turn, "".join(texts), techniques)
+    except Exception as e:
+        yield {"event": "error", "data": {"status": 500, "detail": f"Error: {e}"}}
+        return
+    yield {"event": "done", "data": jsonable_encoder(response)}
+
+
+def format_sse(event: Dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
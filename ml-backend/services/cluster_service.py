@@ -0,0 +1,120 @@
+from fastapi import HTTPException
+from pydantic import BaseModel
+from typing import List, Dict
+import os
+import time
+import threading
+import numpy as np
+
+from utils.cluster_artifacts import ClusterModel, current_mtime_ns, load_serving_model
+from services.model_registry import registry
+
+
+class UserScores(BaseModel):
+    stress: float
+    anxiety: float
+    depression: float
+
+
+class ClusterResult(BaseModel):
+    clusterId: int
+    label: str
+    confidence: float
+
+
+class ClusterBatchRequest(BaseModel):
+    rows: List[UserScores]
+
+
+class ClusterBatchResponse(BaseModel):
+    results: List[ClusterResult]
+
+
+MAX_BATCH_ROWS = 100_000
+
+# The active cluster version is picked up from models/clusters/CURRENT
+# (see utils/cluster_artifacts.py) without a restart: at most every
+# CLUSTER_MODEL_CHECK_S one request checks the pointer's mtime and, if it
+# changed, loads the new version and swaps it into the registry in one
+# assignment. Requests already scoring keep the centroids they started with.
+CLUSTER_MODEL_CHECK_S = float(os.getenv("CLUSTER_MODEL_CHECK_S", "5"))
+
+_reload_lock = threading.Lock()
+_next_check = 0.0
+_loaded_mtime_ns = None
+
+
+def _load_cluster_model() -> ClusterModel:
+    global _loaded_mtime_ns
+    _loaded_mtime_ns = current_mtime_ns()
+    return load_serving_model()
+
+
+def current_cluster_model() -> ClusterModel:
+    global _next_check, _loaded_mtime_ns
+    model = registry.get("cluster")
+    now = time.monotonic()
+    if now < _next_check or not _reload_lock.acquire(blocking=False):
+        return model
+    try:
+        _next_check = now + CLUSTER_MODEL_CHECK_S
+        mtime_ns = current_mtime_ns()
+        if mtime_ns != _loaded_mtime_ns:
+            _loaded_mtime_ns = mtime_ns
+            model = load_serving_model()
+            registry.set("cluster", model)
+            print(f"Cluster model switched to {model.version}")
+    except Exception as exc:
+        print(f"Keeping cluster model {model.version}: {exc}")
+    finally:
+        _reload_lock.release()
+    return model
+
+
+def cluster_model_info() -> Dict:
+    model = current_cluster_model()
+    return {
+        "version": model.version,
+        "clusters": {model.labels.get(i, "unknown"): [round(float(v), 3) for v in c] for i, c in enumerate(model.centroids)},
+    }
+
+
+def score_clusters(x: np.ndarray, centroids: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest centroid and its distance for every row, in one pass.
+
+    Same assignment as ``KMeans.predict`` and the same distances as
+    ``KMeans.transform``, without computing the distances twice.
+    """
+
+    if centroids is None:
+        centroids = current_cluster_model().centroids
+    x = np.asarray(x, dtype=np.float64).reshape(-1, centroids.shape[1])
+    distances = np.sqrt(((x[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2))
+    cluster_ids = distances.argmin(axis=1)
+    nearest = distances[np.arange(len(x)), cluster_ids]
+    return cluster_ids, nearest
+
+
+def score_rows(x: np.ndarray) -> List[Dict]:
+    model = current_cluster_model()
+    cluster_ids, nearest = score_clusters(x, model.centroids)
+    # Confidence: inverse distance to centroid (simple metric)
+    confidences = 1.0 / (1.0 + nearest)
+    return [
+        {"clusterId": int(cid), "label": model.labels.get(int(cid), "unknown"), "confidence": float(conf)}
+        for cid, conf in zip(cluster_ids.tolist(), confidences.tolist())
+    ]
+
+
+def predict_cluster_service(scores: UserScores) -> Dict:
+    return score_rows(np.array([[scores.stress, scores.anxiety, scores.depression]]))[0]
+
+
+def predict_cluster_batch_service(payload: ClusterBatchRequest) -> ClusterBatchResponse:
+    if len(payload.rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ROWS} rows per request")
+    x = np.array([[r.stress, r.anxiety, r.depression] for r in payload.rows], dtype=np.float64)
+    return ClusterBatchResponse(results=[ClusterResult(**row) for row in score_rows(x)])
+
+
+registry.register("cluster", _load_cluster_model, lambda model: score_clusters(np.zeros((1, model.centroids.shape[1])), model.centroids))
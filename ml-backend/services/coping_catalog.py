@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+
+# -----------------------------------------------------------
+# COPING STRATEGY CATALOG
+# -----------------------------------------------------------
+# CopingStrategy.json is re-read when its mtime changes, so clinicians'
+# edits go live without a restart. At most one request every
+# COPING_CATALOG_CHECK_S stats the file; the reload itself runs in whichever
+# request noticed the change while every other request keeps reading the
+# previous snapshot, which is swapped out in a single assignment. A file
+# that fails to parse is logged and the previous catalog stays in place.
+#
+# The version is a hash of the file contents, so every worker reports the
+# same version (and ETag) for the same catalog.
+COPING_STRATEGY_PATH = Path(os.getenv("COPING_STRATEGY_PATH", str(Path(__file__).parent.parent / "CopingStrategy.json")))
+COPING_CATALOG_CHECK_S = float(os.getenv("COPING_CATALOG_CHECK_S", "2"))
+
+
+class CatalogSnapshot(NamedTuple):
+    strategies: Dict[str, Dict[str, str]]
+    version: str
+    mtime_ns: Optional[int]
+
+
+def parse_coping_strategies(raw: bytes) -> Dict[str, Dict[str, str]]:
+    payload = json.loads(raw)
+    return {emotion.lower(): {k.lower(): v for k, v in strategies.items()} for emotion, strategies in payload.items()}
+
+
+class CopingCatalog:
+    def __init__(self, path: Path, check_interval_s: float = COPING_CATALOG_CHECK_S):
+        self.path = path
+        self.check_interval_s = check_interval_s
+        self._reload_lock = threading.Lock()
+        self._next_check = 0.0
+        self.reloads = 0
+        self.reload_errors = 0
+        self._snapshot = CatalogSnapshot({}, "empty", None)
+        self._load(self._mtime_ns(), initial=True)
+
+    def _mtime_ns(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, mtime_ns: Optional[int], initial: bool = False) -> None:
+        if mtime_ns is None:
+            self._snapshot = CatalogSnapshot({}, "empty", None)
+            return
+        raw = self.path.read_bytes()
+        try:
+            strategies = parse_coping_strategies(raw)
+        except (json.JSONDecodeError, AttributeError) as exc:
+            if initial:
+                raise RuntimeError(f"Invalid coping strategy JSON: {exc}")
+            self.reload_errors += 1
+            print(f"Keeping coping catalog {self._snapshot.version}: {self.path} is invalid ({exc})")
+            # Remember the broken mtime so it is not re-parsed on every check.
+            self._snapshot = self._snapshot._replace(mtime_ns=mtime_ns)
+            return
+        version = hashlib.sha256(raw).hexdigest()[:12]
+        self._snapshot = CatalogSnapshot(strategies, version, mtime_ns)
+        if not initial:
+            self.reloads += 1
+            print(f"Coping catalog reloaded (version {version})")
+
+    def snapshot(self) -> CatalogSnapshot:
+        now = time.monotonic()
+        if now >= self._next_check and self._reload_lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval_s
+                mtime_ns = self._mtime_ns()
+                if mtime_ns != self._snapshot.mtime_ns:
+                    self._load(mtime_ns)
+            except OSError as exc:
+                print(f"Coping catalog check failed: {exc}")
+            finally:
+                self._reload_lock.release()
+        return self._snapshot
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            "path": str(self.path),
+            "version": snapshot.version,
+            "emotions": len(snapshot.strategies),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+coping_catalog = CopingCatalog(COPING_STRATEGY_PATH)
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from services.executor import inference_pool
+from services.inference_scheduler import scheduler
+from services.metrics import metrics
+
+
+# -----------------------------------------------------------
+# GRACEFUL DEGRADATION UNDER OVERLOAD
+# -----------------------------------------------------------
+# When the transformer falls behind, /chatbot/analyze and the chat routes
+# switch to a heuristics-only mode instead of queueing until clients time
+# out: the emotion is reported as "unknown", stress is taken from the risk
+# check, and academic stress, risk and overall status still come from the
+# keyword heuristics. Responses carry ``degraded: true``.
+#
+# Load is measured as the backlog (texts waiting for a forward pass plus
+# requests waiting for a pool thread) and the recent submit-to-result
+# latency of the scheduler. Degraded mode starts when either passes its
+# DEGRADE_ENTER_* threshold and ends only once both are below the lower
+# DEGRADE_EXIT_* thresholds and at least DEGRADE_MIN_SECONDS have passed,
+# so the backend does not flap around a single threshold. A latency value
+# older than DEGRADE_LATENCY_STALE_S counts as zero, because in degraded
+# mode little or no traffic reaches the scheduler to refresh it.
+#
+# DEGRADE_MODE=off disables the switch, DEGRADE_MODE=on forces degraded
+# mode (for drills and tests).
+DEGRADE_MODE = os.getenv("DEGRADE_MODE", "auto").lower()
+DEGRADE_ENTER_BACKLOG = int(os.getenv("DEGRADE_ENTER_BACKLOG", "48"))
+DEGRADE_EXIT_BACKLOG = int(os.getenv("DEGRADE_EXIT_BACKLOG", "8"))
+DEGRADE_ENTER_LATENCY_MS = float(os.getenv("DEGRADE_ENTER_LATENCY_MS", "2000"))
+DEGRADE_EXIT_LATENCY_MS = float(os.getenv("DEGRADE_EXIT_LATENCY_MS", "500"))
+DEGRADE_MIN_SECONDS = float(os.getenv("DEGRADE_MIN_SECONDS", "10"))
+DEGRADE_LATENCY_STALE_S = float(os.getenv("DEGRADE_LATENCY_STALE_S", "5"))
+
+DEGRADE_TRANSITIONS = metrics.counter(
+    "mindplus_degraded_transitions_total", "Switches into and out of heuristics-only mode."
+)
+DEGRADED_RESPONSES = metrics.counter(
+    "mindplus_degraded_responses_total", "Responses produced without the emotion model."
+)
+
+
+class DegradationController:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.degraded = DEGRADE_MODE == "on"
+        self.since = time.monotonic()
+        self.entered = 0
+        self.reason = "forced" if self.degraded else ""
+
+    def _backlog(self) -> int:
+        return scheduler.stats()["queue_depth"] + inference_pool.stats()["queued"]
+
+    def _latency_ms(self) -> float:
+        if time.monotonic() - scheduler.latency_updated > DEGRADE_LATENCY_STALE_S:
+            return 0.0
+        return scheduler.latency_ewma_s * 1000.0
+
+    def active(self) -> bool:
+        """Whether requests should skip the emotion model right now."""
+
+        if DEGRADE_MODE in ("on", "off"):
+            return self.degraded
+        backlog = self._backlog()
+        latency_ms = self._latency_ms()
+        with self._lock:
+            now = time.monotonic()
+            if not self.degraded:
+                if backlog >= DEGRADE_ENTER_BACKLOG or latency_ms >= DEGRADE_ENTER_LATENCY_MS:
+                    self.degraded, self.since = True, now
+                    self.entered += 1
+                    self.reason = f"backlog {backlog}" if backlog >= DEGRADE_ENTER_BACKLOG else f"latency {latency_ms:.0f} ms"
+                    DEGRADE_TRANSITIONS.inc(to="degraded")
+                    print(f"Entering degraded mode ({self.reason})")
+            elif (
+                now - self.since >= DEGRADE_MIN_SECONDS
+                and backlog <= DEGRADE_EXIT_BACKLOG
+                and latency_ms <= DEGRADE_EXIT_LATENCY_MS
+            ):
+                self.degraded, self.since = False, now
+                DEGRADE_TRANSITIONS.inc(to="normal")
+                print(f"Leaving degraded mode after {self.reason}")
+            return self.degraded
+
+    def stats(self) -> Dict:
+        return {
+            "mode": DEGRADE_MODE,
+            "degraded": self.degraded,
+            "reason": self.reason if self.degraded else "",
+            "seconds_in_state": time.monotonic() - self.since,
+            "times_entered": self.entered,
+            "backlog": self._backlog(),
+            "latency_ms": self._latency_ms(),
+        }
+
+
+degradation = DegradationController()
@@ -0,0 +1,259 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+import fcntl
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+# -----------------------------------------------------------
+# EMOTION MODEL BACKENDS
+# -----------------------------------------------------------
+# Every backend takes tokenizer output as NumPy arrays and returns logits
+# (``forward``) or class probabilities (``predict_proba``) as NumPy arrays,
+# so the inference engine does not care whether PyTorch or ONNX Runtime
+# runs the forward pass.
+#
+#   torch      PyTorch eager (default)
+#   onnx       the same weights exported to ONNX, run with onnxruntime
+#   onnx-int8  the ONNX export with dynamic int8 quantization
+ONNX_DIR = Path(os.getenv("EMOTION_ONNX_DIR", str(Path(__file__).parent.parent / "models" / "onnx")))
+INPUT_NAMES = ["input_ids", "attention_mask"]
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self._torch = torch
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.id2label: Dict[int, str] = dict(self.model.config.id2label)
+
+    def forward(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        torch = self._torch
+        with torch.no_grad():
+            inputs = {k: torch.from_numpy(encoded[k]) for k in INPUT_NAMES}
+            return self.model(**inputs).logits.numpy()
+
+    def predict_proba(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        return softmax(self.forward(encoded))
+
+    def parameter_count(self) -> int:
+        return sum(p.numel() for p in self.model.parameters())
+
+    def resident_bytes(self) -> int:
+        total = sum(p.numel() * p.element_size() for p in self.model.parameters())
+        total += sum(b.numel() * b.element_size() for b in self.model.buffers())
+        return total
+
+
+def _onnx_path(model_name: str, quantized: bool) -> Path:
+    slug = model_name.strip("/").replace("/", "__")
+    return ONNX_DIR / slug / ("model-int8.onnx" if quantized else "model.onnx")
+
+
+# Files that determine what an export computes. An export is only reused
+# while the fingerprint of these files matches the one stored next to it
+# (``model.onnx.source``), so retrained weights in a local directory or a
+# new Hub revision are re-exported instead of silently served stale.
+SOURCE_FILES = ("config.json", "model.safetensors", "pytorch_model.bin")
+SOURCE_PATTERNS = (re.compile(r"model-\d+-of-\d+\.safetensors"), re.compile(r"pytorch_model-\d+-of-\d+\.bin"))
+_SHA256_NAME = re.compile(r"[0-9a-f]{64}")
+
+
+def _file_digest(path: Path) -> str:
+    # Hub snapshots link to blobs named by their sha256; reuse the name
+    # instead of rehashing hundreds of MB on every start.
+    resolved = path.resolve()
+    if _SHA256_NAME.fullmatch(resolved.name):
+        return resolved.name
+    digest = hashlib.sha256()
+    with open(resolved, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(model_name: str) -> str:
+    """sha256 over the model's config and weight files (local dir or Hub snapshot)."""
+    from transformers.utils import cached_file
+
+    directory = Path(cached_file(model_name, "config.json")).parent
+    files = sorted(
+        p for p in directory.iterdir()
+        if p.name in SOURCE_FILES or any(pattern.fullmatch(p.name) for pattern in SOURCE_PATTERNS)
+    )
+    digest = hashlib.sha256()
+    for p in files:
+        digest.update(f"{p.name}={_file_digest(p)}\n".encode())
+    return digest.hexdigest()
+
+
+def _source_path(path: Path) -> Path:
+    return path.with_name(path.name + ".source")
+
+
+def _is_current(path: Path, fingerprint: str) -> bool:
+    source = _source_path(path)
+    return path.exists() and source.exists() and source.read_text().strip() == fingerprint
+
+
+def _write_source(path: Path, fingerprint: str) -> None:
+    # Written after the export is in place, so a matching fingerprint always
+    # describes the file next to it.
+    tmp = _tmp_path(path).with_suffix(".source")
+    tmp.write_text(fingerprint)
+    os.replace(tmp, _source_path(path))
+
+
+def _tmp_path(path: Path) -> Path:
+    # Unique per process and call, so concurrent exports never share a file.
+    return path.with_name(f"{path.stem}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp.onnx")
+
+
+@contextmanager
+def _export_lock(directory: Path):
+    """Serialise exports across processes (gunicorn workers load the ONNX
+    backends themselves); later processes wait and reuse the first export."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".export.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def export_onnx(model_name: str, path: Path) -> Path:
+    """Export the Hugging Face model to ONNX with dynamic batch and sequence axes."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    sample = tokenizer(["export sample", "a second, longer export sample"], return_tensors="pt", padding=True)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(tmp),
+            input_names=INPUT_NAMES,
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+    os.replace(tmp, path)
+    return path
+
+
+def quantize_onnx(source: Path, target: Path) -> Path:
+    """Dynamic int8 quantization of the linear layers (weights only)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp = _tmp_path(target)
+    quantize_dynamic(str(source), str(tmp), weight_type=QuantType.QInt8)
+    os.replace(tmp, target)
+    return target
+
+
+def ensure_onnx_model(model_name: str, quantized: bool) -> Path:
+    fp32 = _onnx_path(model_name, quantized=False)
+    int8 = _onnx_path(model_name, quantized=True)
+    target = int8 if quantized else fp32
+    fingerprint = source_fingerprint(model_name)
+    if _is_current(target, fingerprint):
+        return target
+    with _export_lock(fp32.parent):
+        if not _is_current(fp32, fingerprint):
+            print(f"Exporting {model_name} to ONNX (no export for the current weights)")
+            export_onnx(model_name, fp32)
+            # The export may have downloaded the weights, so fingerprint again.
+            fingerprint = source_fingerprint(model_name)
+            _write_source(fp32, fingerprint)
+        if quantized and not _is_current(int8, fingerprint):
+            quantize_onnx(fp32, int8)
+            _write_source(int8, fingerprint)
+    return target
+
+
+class OnnxBackend:
+    def __init__(self, model_name: str, quantized: bool = False):
+        import onnxruntime as ort
+        from transformers import AutoConfig
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        self.path = ensure_onnx_model(model_name, quantized)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = os.getenv("ONNX_INTRA_OP_THREADS")
+        if threads:
+            options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(str(self.path), options, providers=["CPUExecutionProvider"])
+        self.id2label: Dict[int, str] = {int(k): v for k, v in AutoConfig.from_pretrained(model_name).id2label.items()}
+
+    def forward(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        inputs = {k: encoded[k].astype(np.int64) for k in INPUT_NAMES}
+        return self.session.run(["logits"], inputs)[0]
+
+    def predict_proba(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        return softmax(self.forward(encoded))
+
+    def parameter_count(self) -> int:
+        import onnx
+
+        graph = onnx.load(str(self.path), load_external_data=False).graph
+        return sum(int(np.prod(t.dims)) for t in graph.initializer)
+
+    def resident_bytes(self) -> int:
+        # ONNX Runtime owns its weight buffers; the serialized graph size is
+        # a close and stable approximation of what it keeps resident.
+        return self.path.stat().st_size
+
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_backend(name: str, model_name: str):
+    name = name.lower()
+    if name == "torch":
+        return TorchBackend(model_name)
+    if name == "onnx":
+        return OnnxBackend(model_name, quantized=False)
+    if name == "onnx-int8":
+        return OnnxBackend(model_name, quantized=True)
+    raise ValueError(f"Unknown EMOTION_BACKEND '{name}', expected one of {', '.join(BACKENDS)}")
+
+
+def time_backend(backend, encoded_batches: List[Dict[str, np.ndarray]], repeats: int = 5) -> float:
+    """Mean seconds per batch over ``repeats`` passes (after one warmup pass)."""
+    for encoded in encoded_batches:
+        backend.predict_proba(encoded)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for encoded in encoded_batches:
+            backend.predict_proba(encoded)
+    return (time.perf_counter() - start) / (repeats * len(encoded_batches))
@@ -1,10 +1,15 @@
+from fastapi import HTTPException, Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict
-from transformers import pipeline
 import os
 import re
-import json
-from pathlib import Path
+from services.inference_engine import MODEL_NAME, classify_batch
+from services.inference_scheduler import scheduler
+from services.inference_cache import cache
+from services.executor import inference_pool
+from services.coping_catalog import coping_catalog, CatalogSnapshot
+from services.cascade import sparse_stage
+from services.chatbot_service import screen_risk
 
 
 class PredictRequest(BaseModel):
@@ -18,6 +23,17 @@ class PredictResponse(BaseModel):
     keywords: List[str]
 
 
+class PredictBatchRequest(BaseModel):
+    texts: List[str]
+
+
+class PredictBatchResponse(BaseModel):
+    items: List[PredictResponse]
+    emotion: str
+    confidence: float
+    model: Optional[str] = None
+
+
 class CopingStrategyRequest(BaseModel):
     emotion: str
     confidence: float
@@ -25,35 +41,20 @@ class CopingStrategyRequest(BaseModel):
 
 class CopingStrategyResponse(BaseModel):
     emotion: str
-    confidence: float
+    # None on the cacheable GET, which is keyed by severity only.
+    confidence: Optional[float]
     severity: str
     strategy: Optional[str]
+    version: Optional[str] = None
 
 
 STOPWORDS = {
     "the","a","an","and","or","but","if","then","so","to","for","of","on","in","at","is","am","are","was","were","be","been","being","i","you","he","she","it","they","them","we","me","my","your","our","with","this","that","those","these","about","just","very","really","feel","feeling"
 }
 
-MODEL_NAME = os.getenv("EMOTION_MODEL_NAME", "j-hartmann/emotion-english-distilroberta-base")
-
-classifier = pipeline("text-classification", model=MODEL_NAME)
-
-COPING_STRATEGY_PATH = Path(__file__).parent.parent / "CopingStrategy.json"
-
-
-def load_coping_strategies(path: Path) -> Dict[str, Dict[str, str]]:
-    try:
-        with path.open("r", encoding="utf-8") as fh:
-            payload = json.load(fh)
-            return {emotion.lower(): {k.lower(): v for k, v in strategies.items()} for emotion, strategies in payload.items()}
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Invalid coping strategy JSON: {exc}")
-
-
-COPING_STRATEGIES = load_coping_strategies(COPING_STRATEGY_PATH)
-
+MAX_BATCH_TEXTS = 64
+SEVERITIES = ("low", "medium", "high")
+COPING_CACHE_MAX_AGE_S = int(os.getenv("COPING_CACHE_MAX_AGE_S", "300"))
 
 async def health():
     return {"status": "ok", "service": "emotion", "model": MODEL_NAME}
@@ -83,38 +84,134 @@ def pick_severity(confidence: float) -> str:
     return "low"
 
 
-def get_coping_strategy(emotion: str, confidence: float) -> Optional[str]:
-    severity = pick_severity(confidence)
-    strategies = COPING_STRATEGIES.get(emotion.lower()) or COPING_STRATEGIES.get("neutral")
+def get_coping_strategy(emotion: str, severity: str, catalog: Optional[CatalogSnapshot] = None) -> Optional[str]:
+    strategies = (catalog or coping_catalog.snapshot()).strategies
+    strategies = strategies.get(emotion.lower()) or strategies.get("neutral")
     if not strategies:
         return None
     return strategies.get(severity)
 
 
-async def predict(payload: PredictRequest) -> PredictResponse:
+async def predict(payload: PredictRequest, client_key: str = "") -> PredictResponse:
     text = payload.text.strip()
     if not text:
         return PredictResponse(emotion="neutral", confidence=0.0, model=MODEL_NAME, keywords=[])
-    raw = classifier(text)   
-    first = raw[0]
-    if isinstance(first, list): 
-        best = max(first, key=lambda x: x.get("score", 0.0))
-    else:
-        best = first
+    # client_key goes to the pool (per-client in-flight limit, 429) as well as
+    # to the scheduler (fair batching), so it is passed twice.
+    best, model = await inference_pool.run(classify_cascaded, text, client_key, client_key=client_key or None)
     emotion = best["label"].lower()
     confidence = float(best["score"])
     keywords = extract_keywords(text)
-    return PredictResponse(emotion=emotion, confidence=confidence, model=MODEL_NAME, keywords=keywords)
+    return PredictResponse(emotion=emotion, confidence=confidence, model=model, keywords=keywords)
+
+
+def classify_cascaded(text: str, client_key: str = "") -> tuple[Dict, str]:
+    """``(result, model name)``: the sparse stage when it is confident
+    (cascade mode only), the transformer otherwise."""
+    hits, risk = screen_risk(text)
+    cheap = sparse_stage(text, hits, risk, "predict")
+    if cheap is not None:
+        return cheap, "stress_model"
+    return scheduler.classify(text, client_key), MODEL_NAME
+
+
+def summarize_predictions(items: List[PredictResponse]) -> tuple[str, float]:
+    """Pick the emotion with the highest summed confidence.
+
+    Mirrors ``deriveSummaryStats`` in the mobile app so a daily check-in
+    summary is the same whether it is computed here or on the device.
+    """
+
+    tally: Dict[str, List[float]] = {}
+    for item in items:
+        tally.setdefault(item.emotion or "unknown", []).append(item.confidence)
+    if not tally:
+        return "unknown", 0.0
+
+    winner = max(tally, key=lambda emotion: sum(tally[emotion]))
+    contributions = tally[winner]
+    return winner, sum(contributions) / len(contributions)
+
+
+async def predict_batch(payload: PredictBatchRequest) -> PredictBatchResponse:
+    if len(payload.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per request")
+
+    texts = [t.strip() for t in payload.texts]
+    non_empty = [t for t in texts if t]
+    results = iter(await inference_pool.run(cache.classify_batch, non_empty, classify_batch))
+
+    items: List[PredictResponse] = []
+    for text in texts:
+        if not text:
+            items.append(PredictResponse(emotion="neutral", confidence=0.0, model=MODEL_NAME, keywords=[]))
+            continue
+        best = next(results)
+        items.append(PredictResponse(
+            emotion=best["label"].lower(),
+            confidence=float(best["score"]),
+            model=MODEL_NAME,
+            keywords=extract_keywords(text),
+        ))
+
+    emotion, confidence = summarize_predictions(items)
+    return PredictBatchResponse(items=items, emotion=emotion, confidence=confidence, model=MODEL_NAME)
 
 
 async def coping_strategy(payload: CopingStrategyRequest):
     emotion = payload.emotion.strip().lower() or "neutral"
     confidence = max(0.0, min(1.0, payload.confidence))
     severity = pick_severity(confidence)
-    strategy = get_coping_strategy(emotion, confidence)
+    catalog = coping_catalog.snapshot()
+    strategy = get_coping_strategy(emotion, severity, catalog)
     return CopingStrategyResponse(
         emotion=emotion,
         confidence=confidence,
         severity=severity,
         strategy=strategy,
+        version=catalog.version,
+    )
+
+
+def cached_coping_strategy(
+    emotion: str,
+    severity: Optional[str],
+    confidence: Optional[float],
+    if_none_match: Optional[str],
+) -> Response:
+    """GET variant: a strategy is a pure function of (emotion, severity,
+    catalog version), so the response carries an ETag and Cache-Control and
+    a matching If-None-Match gets an empty 304."""
+
+    emotion = emotion.strip().lower() or "neutral"
+    if severity is None:
+        if confidence is None:
+            raise HTTPException(status_code=422, detail="Pass either severity or confidence")
+        severity = pick_severity(max(0.0, min(1.0, confidence)))
+    severity = severity.lower()
+    if severity not in SEVERITIES:
+        raise HTTPException(status_code=422, detail=f"severity must be one of {', '.join(SEVERITIES)}")
+
+    catalog = coping_catalog.snapshot()
+    # Emotions outside the catalog get the "neutral" strategies (as in
+    # get_coping_strategy); normalising first keeps the ETag to known,
+    # header-safe names and gives every unknown emotion the same cache entry.
+    if emotion not in catalog.strategies:
+        emotion = "neutral"
+    etag = f'"{catalog.version}-{emotion}-{severity}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={COPING_CACHE_MAX_AGE_S}",
+        "X-Catalog-Version": catalog.version,
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body = CopingStrategyResponse(
+        emotion=emotion,
+        confidence=None,
+        severity=severity,
+        strategy=get_coping_strategy(emotion, severity, catalog),
+        version=catalog.version,
     )
+    return Response(body.model_dump_json(), media_type="application/json", headers=headers)
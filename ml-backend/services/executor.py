@@ -0,0 +1,97 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from services.metrics import INFERENCE_REJECTED
+
+
+# -----------------------------------------------------------
+# BOUNDED INFERENCE POOL
+# -----------------------------------------------------------
+# Model work never runs on the event loop. Routes hand it to this pool,
+# which has a fixed number of threads and a fixed number of waiting
+# slots. When every slot is taken the request is rejected with 503
+# straight away instead of piling up until the client times out.
+#
+# Calls that carry a client key (chat session or user id) are also capped
+# at INFERENCE_MAX_PER_CLIENT in flight per key; beyond that the client gets
+# 429, so a single chatty client cannot take every slot and push everyone
+# else into 503s.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "16"))
+INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "64"))
+INFERENCE_MAX_PER_CLIENT = int(os.getenv("INFERENCE_MAX_PER_CLIENT", "8"))
+
+
+class BoundedExecutor:
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        queue_limit: int = INFERENCE_QUEUE_LIMIT,
+        max_per_client: int = INFERENCE_MAX_PER_CLIENT,
+    ):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.max_per_client = max(1, max_per_client)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._lock = threading.Lock()
+        self._per_client: Dict[str, int] = {}
+        self.in_flight = 0
+        self.rejected = 0
+        self.rejected_client = 0
+
+    def _release(self, client_key: Optional[str]) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if client_key is not None:
+                remaining = self._per_client[client_key] - 1
+                if remaining:
+                    self._per_client[client_key] = remaining
+                else:
+                    del self._per_client[client_key]
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args, client_key: Optional[str] = None, **kwargs) -> Future:
+        with self._lock:
+            if client_key is not None and self._per_client.get(client_key, 0) >= self.max_per_client:
+                self.rejected_client += 1
+                INFERENCE_REJECTED.inc(reason="client_limit")
+                raise HTTPException(status_code=429, detail="Too many requests in flight, please slow down")
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            INFERENCE_REJECTED.inc(reason="pool_full")
+            raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
+        with self._lock:
+            self.in_flight += 1
+            if client_key is not None:
+                self._per_client[client_key] = self._per_client.get(client_key, 0) + 1
+        try:
+            fut = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(client_key)
+            raise
+        fut.add_done_callback(lambda _: self._release(client_key))
+        return fut
+
+    async def run(self, fn: Callable, *args, client_key: Optional[str] = None, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, client_key=client_key, **kwargs))
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "max_per_client": self.max_per_client,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "clients_in_flight": len(self._per_client),
+            "rejected": self.rejected,
+            "rejected_client_limit": self.rejected_client,
+        }
+
+
+inference_pool = BoundedExecutor()
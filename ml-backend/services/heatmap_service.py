@@ -0,0 +1,154 @@
+import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from services.chatbot_service import emotion_to_stress
+from services.heatmap_store import heatmap_store
+
+
+# -----------------------------------------------------------
+# REQUEST/RESPONSE MODELS
+# -----------------------------------------------------------
+class HeatmapEvent(BaseModel):
+    event_id: str
+    date: str
+
+
+class HeatmapEventsRequest(BaseModel):
+    events: List[HeatmapEvent]
+
+
+class HeatmapCheckIn(BaseModel):
+    checkin_id: str
+    date: str
+    emotion: str
+    confidence: float
+
+
+class HeatmapCheckInsRequest(BaseModel):
+    checkins: List[HeatmapCheckIn]
+
+
+class HeatmapHistoryRequest(BaseModel):
+    events: List[HeatmapEvent]
+    checkins: List[HeatmapCheckIn]
+
+
+class HeatmapDay(BaseModel):
+    date: str
+    day: int
+    event_count: int
+    checkin_count: int
+    mean_confidence: Optional[float] = None
+    dominant_emotion: Optional[str] = None
+    stress_level: str
+
+
+class HeatmapTotals(BaseModel):
+    events: int
+    checkins: int
+
+
+class HeatmapMonthResponse(BaseModel):
+    user_id: str
+    year: int
+    month: int
+    days: List[HeatmapDay]
+    # Everything stored for the user; the app compares these with its
+    # Firestore counts and replaces the history when they differ.
+    totals: HeatmapTotals
+
+
+MAX_WRITE_ITEMS = 1000
+MAX_HISTORY_ITEMS = 20_000
+
+
+def parse_day(value: str) -> str:
+    """Accept the app's ``2026-3-7`` keys as well as ISO dates; store ISO."""
+    try:
+        year, month, day = (int(part) for part in value.split("-"))
+        return datetime.date(year, month, day).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date '{value}', expected YYYY-M-D")
+
+
+# Mirrors getStressLevel in mindplus/src/utils/heatmapUtils.js, with the
+# day's dominant check-in emotion as the base stress.
+BASE_STRESS = {"low": 0, "medium": 1, "high": 2}
+
+
+def day_stress_level(dominant_emotion: Optional[str], event_count: int) -> str:
+    base = BASE_STRESS[emotion_to_stress(dominant_emotion)] if dominant_emotion else 0
+    score = base + event_count
+    if score <= 2:
+        return "low"
+    if score <= 4:
+        return "medium"
+    return "high"
+
+
+def _check_size(items: list, limit: int = MAX_WRITE_ITEMS) -> None:
+    if len(items) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} items per request")
+
+
+def _checkin_rows(checkins: List[HeatmapCheckIn]) -> list:
+    return [
+        (c.checkin_id, parse_day(c.date), c.emotion.lower(), min(1.0, max(0.0, c.confidence)))
+        for c in checkins
+    ]
+
+
+# -----------------------------------------------------------
+# SERVICE FUNCTIONS
+# -----------------------------------------------------------
+# user_id always comes from the verified token (services/auth.py).
+def record_events_service(user_id: str, payload: HeatmapEventsRequest) -> dict:
+    _check_size(payload.events)
+    heatmap_store.put_events(user_id, [(e.event_id, parse_day(e.date)) for e in payload.events])
+    return {"recorded": len(payload.events)}
+
+
+def delete_event_service(user_id: str, event_id: str) -> dict:
+    if not heatmap_store.delete_event(user_id, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    return {"deleted": event_id}
+
+
+def record_checkins_service(user_id: str, payload: HeatmapCheckInsRequest) -> dict:
+    _check_size(payload.checkins)
+    heatmap_store.put_checkins(user_id, _checkin_rows(payload.checkins))
+    return {"recorded": len(payload.checkins)}
+
+
+def replace_history_service(user_id: str, payload: HeatmapHistoryRequest) -> dict:
+    _check_size(payload.events, MAX_HISTORY_ITEMS)
+    _check_size(payload.checkins, MAX_HISTORY_ITEMS)
+    heatmap_store.replace_history(
+        user_id,
+        [(e.event_id, parse_day(e.date)) for e in payload.events],
+        _checkin_rows(payload.checkins),
+    )
+    return {"events": len(payload.events), "checkins": len(payload.checkins)}
+
+
+def heatmap_month_service(user_id: str, year: int, month: int) -> HeatmapMonthResponse:
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise HTTPException(status_code=400, detail="Invalid year or month")
+    days = [
+        HeatmapDay(
+            **row,
+            day=int(row["date"][-2:]),
+            stress_level=day_stress_level(row["dominant_emotion"], row["event_count"]),
+        )
+        for row in heatmap_store.month(user_id, year, month)
+    ]
+    return HeatmapMonthResponse(
+        user_id=user_id,
+        year=year,
+        month=month,
+        days=days,
+        totals=HeatmapTotals(**heatmap_store.totals(user_id)),
+    )
@@ -0,0 +1,198 @@
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# -----------------------------------------------------------
+# HEATMAP DAY ROLLUPS
+# -----------------------------------------------------------
+# One row per (user, day) with the calendar event count, the check-in
+# count, the sum of check-in confidences and the count of each check-in
+# emotion (plus the dominant one), so a month of the heatmap is a single
+# primary-key range read of at most 31 rows.
+#
+# The rollups are updated incrementally as the app reports writes. Every
+# event and check-in is also kept by id with the day (and emotion and
+# confidence) it was counted under, which makes the writes idempotent: a
+# re-sent write changes nothing, an edited one moves its contribution and a
+# deleted one takes it back out. The file is SQLite in WAL mode, shared by
+# every worker on the host.
+#
+# Check-ins the emotion model could not classify (emotion "unknown") are
+# kept by id but not scored, so the per-user totals match the number of
+# check-ins the app has; the app compares those totals with Firestore to
+# find a store that missed writes (or was lost) and then replaces the
+# user's history.
+UNSCORED_EMOTION = "unknown"
+HEATMAP_DB_PATH = os.getenv("HEATMAP_DB_PATH", str(Path(__file__).parent.parent / "data" / "heatmap.sqlite3"))
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS heatmap_days ("
+    "user_id TEXT NOT NULL, day TEXT NOT NULL, event_count INTEGER NOT NULL DEFAULT 0,"
+    "checkin_count INTEGER NOT NULL DEFAULT 0, confidence_sum REAL NOT NULL DEFAULT 0,"
+    "emotion_counts TEXT NOT NULL DEFAULT '{}', dominant_emotion TEXT,"
+    "PRIMARY KEY (user_id, day)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS heatmap_events ("
+    "user_id TEXT NOT NULL, event_id TEXT NOT NULL, day TEXT NOT NULL,"
+    "PRIMARY KEY (user_id, event_id)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS heatmap_checkins ("
+    "user_id TEXT NOT NULL, checkin_id TEXT NOT NULL, day TEXT NOT NULL, emotion TEXT NOT NULL,"
+    "confidence REAL NOT NULL, PRIMARY KEY (user_id, checkin_id)) WITHOUT ROWID",
+)
+
+
+def dominant(emotion_counts: Dict[str, int]) -> Optional[str]:
+    # Ties go to the alphabetically first emotion so every worker agrees.
+    if not emotion_counts:
+        return None
+    return min(emotion_counts, key=lambda emotion: (-emotion_counts[emotion], emotion))
+
+
+class HeatmapStore:
+    def __init__(self, path: str = HEATMAP_DB_PATH):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connect()
+        # Each forked worker (gunicorn preload) opens its own connection.
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._lock = threading.Lock()
+
+    def _adjust(
+        self, user_id: str, day: str, events: int = 0, confidence: float = 0.0,
+        emotion: Optional[str] = None, checkins: int = 0,
+    ) -> None:
+        row = self._conn.execute(
+            "SELECT emotion_counts FROM heatmap_days WHERE user_id = ? AND day = ?", (user_id, day)
+        ).fetchone()
+        counts = json.loads(row[0]) if row else {}
+        if emotion is not None:
+            counts[emotion] = counts.get(emotion, 0) + checkins
+            if counts[emotion] <= 0:
+                del counts[emotion]
+        self._conn.execute(
+            "INSERT INTO heatmap_days (user_id, day, event_count, checkin_count, confidence_sum, emotion_counts, dominant_emotion) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user_id, day) DO UPDATE SET "
+            "event_count = event_count + excluded.event_count, checkin_count = checkin_count + excluded.checkin_count, "
+            "confidence_sum = confidence_sum + excluded.confidence_sum, emotion_counts = excluded.emotion_counts, "
+            "dominant_emotion = excluded.dominant_emotion",
+            (user_id, day, events, checkins, confidence, json.dumps(counts, sort_keys=True), dominant(counts)),
+        )
+
+    def _transaction(self, apply) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                apply()
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _put_events(self, user_id: str, events: Iterable[Tuple[str, str]]) -> None:
+        for event_id, day in events:
+            row = self._conn.execute(
+                "SELECT day FROM heatmap_events WHERE user_id = ? AND event_id = ?", (user_id, event_id)
+            ).fetchone()
+            if row and row[0] == day:
+                continue
+            if row:
+                self._adjust(user_id, row[0], events=-1)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO heatmap_events (user_id, event_id, day) VALUES (?, ?, ?)",
+                (user_id, event_id, day),
+            )
+            self._adjust(user_id, day, events=1)
+
+    def _put_checkins(self, user_id: str, checkins: Iterable[Tuple[str, str, str, float]]) -> None:
+        for checkin_id, day, emotion, confidence in checkins:
+            row = self._conn.execute(
+                "SELECT day, emotion, confidence FROM heatmap_checkins WHERE user_id = ? AND checkin_id = ?",
+                (user_id, checkin_id),
+            ).fetchone()
+            if row == (day, emotion, confidence):
+                continue
+            if row and row[1] != UNSCORED_EMOTION:
+                self._adjust(user_id, row[0], confidence=-row[2], emotion=row[1], checkins=-1)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO heatmap_checkins (user_id, checkin_id, day, emotion, confidence) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, checkin_id, day, emotion, confidence),
+            )
+            if emotion != UNSCORED_EMOTION:
+                self._adjust(user_id, day, confidence=confidence, emotion=emotion, checkins=1)
+
+    def put_events(self, user_id: str, events: Iterable[Tuple[str, str]]) -> None:
+        """Record ``(event_id, day)`` pairs; an event seen before is moved to its new day."""
+        self._transaction(lambda: self._put_events(user_id, events))
+
+    def delete_event(self, user_id: str, event_id: str) -> bool:
+        deleted = []
+
+        def apply():
+            row = self._conn.execute(
+                "DELETE FROM heatmap_events WHERE user_id = ? AND event_id = ? RETURNING day", (user_id, event_id)
+            ).fetchone()
+            if row:
+                self._adjust(user_id, row[0], events=-1)
+                deleted.append(row[0])
+
+        self._transaction(apply)
+        return bool(deleted)
+
+    def put_checkins(self, user_id: str, checkins: Iterable[Tuple[str, str, str, float]]) -> None:
+        """Record ``(checkin_id, day, emotion, confidence)``; a known check-in replaces its old values."""
+        self._transaction(lambda: self._put_checkins(user_id, checkins))
+
+    def replace_history(
+        self, user_id: str, events: Iterable[Tuple[str, str]], checkins: Iterable[Tuple[str, str, str, float]]
+    ) -> None:
+        """Replace everything kept for the user (events, check-ins and day rollups) in one transaction."""
+
+        def apply():
+            for table in ("heatmap_days", "heatmap_events", "heatmap_checkins"):
+                self._conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+            self._put_events(user_id, events)
+            self._put_checkins(user_id, checkins)
+
+        self._transaction(apply)
+
+    def totals(self, user_id: str) -> Dict[str, int]:
+        with self._lock:
+            events = self._conn.execute("SELECT COUNT(*) FROM heatmap_events WHERE user_id = ?", (user_id,)).fetchone()[0]
+            checkins = self._conn.execute(
+                "SELECT COUNT(*) FROM heatmap_checkins WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+        return {"events": events, "checkins": checkins}
+
+    def month(self, user_id: str, year: int, month: int) -> List[Dict]:
+        prefix = f"{year:04d}-{month:02d}-"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, event_count, checkin_count, confidence_sum, dominant_emotion FROM heatmap_days "
+                "WHERE user_id = ? AND day >= ? AND day < ? ORDER BY day",
+                (user_id, prefix + "01", prefix + "99"),
+            ).fetchall()
+        return [
+            {
+                "date": day,
+                "event_count": events,
+                "checkin_count": checkins,
+                "mean_confidence": round(confidence_sum / checkins, 4) if checkins else None,
+                "dominant_emotion": emotion,
+            }
+            for day, events, checkins, confidence_sum, emotion in rows
+            if events or checkins
+        ]
+
+
+heatmap_store = HeatmapStore()
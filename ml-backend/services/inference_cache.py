@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from services.inference_engine import MODEL_NAME, BACKEND
+
+
+# -----------------------------------------------------------
+# INFERENCE RESULT CACHE
+# -----------------------------------------------------------
+# Short check-in answers and chat openers repeat word for word, so model
+# results are cached by (model name, normalized text). Every worker keeps
+# a small in-process LRU; an optional shared backend (SQLite file or a
+# Redis-compatible server) lets several workers reuse each other's hits.
+CACHE_SIZE = int(os.getenv("INFERENCE_CACHE_SIZE", "4096"))
+CACHE_TTL_S = float(os.getenv("INFERENCE_CACHE_TTL_S", "3600"))
+CACHE_BACKEND = os.getenv("INFERENCE_CACHE_BACKEND", "memory").lower()
+CACHE_PATH = os.getenv(
+    "INFERENCE_CACHE_PATH", str(Path(__file__).parent.parent / "data" / "inference_cache.sqlite3")
+)
+CACHE_REDIS_URL = os.getenv("INFERENCE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used both as the cache key and as the model input."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class MemoryCacheBackend:
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """Cache table in a local SQLite file shared by every worker on the host."""
+
+    EVICT_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connect()
+        # A SQLite connection must not be shared across fork (gunicorn
+        # preload), so every worker opens its own.
+        os.register_at_fork(after_in_child=self._connect)
+        self._puts = 0
+        self.evictions = 0
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inference_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS inference_cache_last_used ON inference_cache (last_used)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM inference_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE inference_cache SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inference_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl_s, now),
+            )
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        removed = self._conn.execute("DELETE FROM inference_cache WHERE expires_at <= ?", (now,)).rowcount
+        removed += self._conn.execute(
+            "DELETE FROM inference_cache WHERE key IN ("
+            "SELECT key FROM inference_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self.evictions += max(0, removed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+
+class RedisCacheBackend:
+    """Any Redis-protocol server; expiry and LRU eviction are left to the server
+    (configure ``maxmemory-policy allkeys-lru``)."""
+
+    def __init__(self, url: str, ttl_s: float):
+        import redis
+
+        self.ttl_s = ttl_s
+        self._client = redis.Redis.from_url(url)
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, key: str, value: Dict) -> None:
+        self._client.set(key, json.dumps(value), ex=max(1, int(self.ttl_s)))
+
+    def __len__(self) -> int:
+        return int(self._client.dbsize())
+
+
+def _build_shared_backend():
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(CACHE_PATH, CACHE_SIZE * 16, CACHE_TTL_S)
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend(CACHE_REDIS_URL, CACHE_TTL_S)
+    return None
+
+
+class InferenceCache:
+    def __init__(self, model_name: str, local: MemoryCacheBackend, shared=None):
+        self.model_name = model_name
+        self.local = local
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.local.max_entries > 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict]:
+        """Look up an already normalized text."""
+        if not self.enabled:
+            return None
+        key = self.key(text)
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.put(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, text: str, value: Dict) -> None:
+        if not self.enabled:
+            return
+        key = self.key(text)
+        self.local.put(key, value)
+        if self.shared is not None:
+            self.shared.put(key, value)
+
+    def classify_batch(self, texts: List[str], run_batch: Callable[[List[str]], List[Dict]]) -> List[Dict]:
+        """Serve what we can from the cache and run the rest in one batch."""
+        normalized = [normalize_text(t) for t in texts]
+        results: List[Optional[Dict]] = [self.get(t) for t in normalized]
+        pending = list(dict.fromkeys(t for t, r in zip(normalized, results) if r is None))
+        if pending:
+            fresh = dict(zip(pending, run_batch(pending)))
+            for text, value in fresh.items():
+                self.put(text, value)
+            results = [r if r is not None else fresh[t] for t, r in zip(normalized, results)]
+        return results
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "backend": CACHE_BACKEND,
+            "max_entries": self.local.max_entries,
+            "ttl_s": self.local.ttl_s,
+            "size": len(self.local),
+            "shared_size": len(self.shared) if self.shared is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.local.evictions,
+            "shared_evictions": self.shared.evictions if self.shared is not None else None,
+        }
+
+
+cache = InferenceCache(f"{MODEL_NAME}:{BACKEND}", MemoryCacheBackend(CACHE_SIZE, CACHE_TTL_S), _build_shared_backend())
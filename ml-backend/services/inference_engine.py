@@ -0,0 +1,169 @@
+import os
+os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
+os.environ["HF_HUB_DISABLE_SYMLINKS"] = "1"
+
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from transformers import AutoTokenizer
+from services.emotion_backends import load_backend, softmax
+from services.metrics import stage_timer
+from services.model_registry import registry
+
+
+# -----------------------------------------------------------
+# SHARED EMOTION MODEL
+# -----------------------------------------------------------
+# The emotion classifier is used by both the emotion service and the
+# chatbot service. It is loaded once here so every worker only keeps a
+# single copy of the weights in memory. Loading happens at startup through
+# the model registry, not at import.
+MODEL_NAME = os.getenv("EMOTION_MODEL_NAME", "j-hartmann/emotion-english-distilroberta-base")
+BACKEND = os.getenv("EMOTION_BACKEND", "torch").lower()
+MAX_LENGTH = 256
+
+# Inputs are sorted by token length and run in buckets of at most
+# EMOTION_BUCKET_SIZE sequences, each padded only to its own longest
+# member. Texts longer than MAX_LENGTH tokens are split into overlapping
+# windows (at most EMOTION_MAX_WINDOWS, spread evenly over the text) and
+# their probabilities averaged, weighted by window length.
+BUCKET_SIZE = max(1, int(os.getenv("EMOTION_BUCKET_SIZE", "16")))
+WINDOW_OVERLAP = int(os.getenv("EMOTION_WINDOW_OVERLAP", "64"))
+MAX_WINDOWS = int(os.getenv("EMOTION_MAX_WINDOWS", "8"))
+
+
+def _load_emotion_model() -> Dict:
+    print("Loading model... Please wait...")
+    model = {"tokenizer": AutoTokenizer.from_pretrained(MODEL_NAME), "backend": load_backend(BACKEND, MODEL_NAME)}
+    print(f"Model loaded successfully! (backend: {model['backend'].name})")
+    return model
+
+
+def _warmup_emotion_model(model: Dict) -> None:
+    _run_batch(model, ["Warming up the emotion model."])
+
+
+def classify_batch(texts: List[str]) -> List[Dict]:
+    """Run one forward pass over ``texts`` and return one result per text.
+
+    Each result holds the top ``label``, its ``score`` and the full
+    probability distribution under ``scores``.
+    """
+
+    if not texts:
+        return []
+    return _run_batch(registry.get("emotion"), texts)
+
+
+def _encode_windows(tokenizer, texts: List[str]) -> Tuple[List[List[int]], List[int]]:
+    """Token ids for every window and the index of the text it came from.
+
+    The tokenizer emits overlapping windows for long texts; when a text
+    needs more than MAX_WINDOWS of them, an evenly spread subset is kept.
+    """
+    encoded = tokenizer(
+        texts,
+        truncation=True,
+        max_length=MAX_LENGTH,
+        stride=WINDOW_OVERLAP,
+        return_overflowing_tokens=True,
+    )
+    sample_map = encoded["overflow_to_sample_mapping"]
+    per_text: List[List[int]] = [[] for _ in texts]
+    for window, owner in enumerate(sample_map):
+        per_text[owner].append(window)
+
+    sequences: List[List[int]] = []
+    owners: List[int] = []
+    for owner, windows in enumerate(per_text):
+        if len(windows) > MAX_WINDOWS:
+            windows = [windows[i] for i in np.linspace(0, len(windows) - 1, MAX_WINDOWS).round().astype(int)]
+        for window in windows:
+            sequences.append(encoded["input_ids"][window])
+            owners.append(owner)
+    return sequences, owners
+
+
+def _buckets(sequences: List[List[int]], pad_id: int):
+    """Yield ``(positions, encoded)`` for length-sorted buckets of sequences."""
+    order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+    for start in range(0, len(order), BUCKET_SIZE):
+        positions = order[start:start + BUCKET_SIZE]
+        width = len(sequences[positions[-1]])
+        input_ids = np.full((len(positions), width), pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(positions), width), dtype=np.int64)
+        for row, pos in enumerate(positions):
+            seq = sequences[pos]
+            input_ids[row, :len(seq)] = seq
+            attention_mask[row, :len(seq)] = 1
+        yield positions, {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+def _run_batch(model: Dict, texts: List[str]) -> List[Dict]:
+    backend = model["backend"]
+    tokenizer = model["tokenizer"]
+    with stage_timer("tokenization"):
+        sequences, owners = _encode_windows(tokenizer, texts)
+        buckets = list(_buckets(sequences, tokenizer.pad_token_id or 0))
+    with stage_timer("forward_pass"):
+        window_logits = [None] * len(sequences)
+        for positions, encoded in buckets:
+            for pos, row in zip(positions, backend.forward(encoded)):
+                window_logits[pos] = row
+    with stage_timer("softmax_argmax"):
+        window_probs = softmax(np.stack(window_logits))
+        weights = np.array([len(seq) for seq in sequences], dtype=np.float64)
+        probs = np.zeros((len(texts), window_probs.shape[1]))
+        np.add.at(probs, owners, window_probs * weights[:, None])
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+
+    id2label = backend.id2label
+    results: List[Dict] = []
+    for row, top in zip(probs.tolist(), best.tolist()):
+        results.append({
+            "label": id2label[top],
+            "score": float(row[top]),
+            "scores": {id2label[i]: float(p) for i, p in enumerate(row)},
+        })
+    return results
+
+
+def classify(text: str) -> Dict:
+    return classify_batch([text])[0]
+
+
+registry.register("emotion", _load_emotion_model, _warmup_emotion_model)
+
+
+# -----------------------------------------------------------
+# MEMORY REPORTING
+# -----------------------------------------------------------
+def _process_rss_bytes() -> Optional[int]:
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            resident_pages = int(fh.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def memory_report() -> Dict:
+    models = []
+    if registry.is_loaded("emotion"):
+        backend = registry.get("emotion")["backend"]
+        models.append({
+            "name": MODEL_NAME,
+            "backend": backend.name,
+            "parameters": backend.parameter_count(),
+            "resident_bytes": backend.resident_bytes(),
+        })
+    return {"process_rss_bytes": _process_rss_bytes(), "models": models}
+
+
+def health_service() -> Dict:
+    return {"status": "ok", "service": "inference", **memory_report()}
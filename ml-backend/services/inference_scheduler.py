@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, List, Dict, Tuple
+
+from services.inference_engine import classify_batch
+from services.inference_cache import cache, normalize_text
+from services.model_registry import registry
+from services.metrics import BATCH_SIZE
+
+
+# -----------------------------------------------------------
+# DYNAMIC MICRO-BATCHING
+# -----------------------------------------------------------
+# Concurrent requests are gathered into one padded batch so the model
+# runs a single forward pass for many callers. A batch is flushed when it
+# reaches MAX_BATCH_SIZE or when the oldest request has waited MAX_WAIT_MS.
+#
+# Waiting texts are queued per client key (chat session or user id) and
+# batches are filled round-robin across keys, so a client with a hundred
+# queued texts gets one slot per turn like everyone else instead of
+# pushing other clients to the back of the line.
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], List[Dict]],
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._pending: Dict[str, Deque[Tuple[str, Future, float]]] = {}
+        self._ring: Deque[str] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.batches_run = 0
+        self.items_run = 0
+        # Exponentially weighted submit-to-result latency, and when it was
+        # last updated (the degradation controller ignores stale values).
+        self.latency_ewma_s = 0.0
+        self.latency_updated = 0.0
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+                self._worker.start()
+
+    def _put(self, key: str, item: Tuple[str, Future, float]) -> None:
+        with self._cond:
+            waiting = self._pending.get(key)
+            if waiting is None:
+                waiting = self._pending[key] = deque()
+                self._ring.append(key)
+            waiting.append(item)
+            self._size += 1
+            self._cond.notify()
+
+    def _take(self) -> Tuple[str, Future, float]:
+        # Caller holds self._cond and has checked that something is waiting.
+        key = self._ring.popleft()
+        waiting = self._pending[key]
+        item = waiting.popleft()
+        if waiting:
+            self._ring.append(key)
+        else:
+            del self._pending[key]
+        self._size -= 1
+        return item
+
+    def _collect(self) -> List[Tuple[str, Future, float]]:
+        with self._cond:
+            while not self._size:
+                self._cond.wait()
+            batch = [self._take()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining) or not self._size:
+                        break
+                batch.append(self._take())
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.run_batch([text for text, _, _ in batch])
+            except Exception as exc:
+                for _, fut, _ in batch:
+                    fut.set_exception(exc)
+                continue
+            self.batches_run += 1
+            self.items_run += len(batch)
+            BATCH_SIZE.observe(len(batch))
+            now = time.monotonic()
+            oldest = now - min(submitted for _, _, submitted in batch)
+            self.latency_ewma_s += LATENCY_EWMA_ALPHA * (oldest - self.latency_ewma_s)
+            self.latency_updated = now
+            for (text, fut, _), result in zip(batch, results):
+                cache.put(text, result)
+                fut.set_result(result)
+
+    def submit(self, text: str, key: str = "") -> Future:
+        registry.get("emotion")  # 503 straight away while the model is still loading
+        fut: Future = Future()
+        text = normalize_text(text)
+        cached = cache.get(text)
+        if cached is not None:
+            fut.set_result(cached)
+            return fut
+        self._ensure_worker()
+        self._put(key, (text, fut, time.monotonic()))
+        return fut
+
+    def classify(self, text: str, key: str = "") -> Dict:
+        """Blocking call for sync routes."""
+        return self.submit(text, key).result()
+
+    async def classify_async(self, text: str, key: str = "") -> Dict:
+        return await asyncio.wrap_future(self.submit(text, key))
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._size,
+            "clients_waiting": len(self._pending),
+            "latency_ewma_ms": self.latency_ewma_s * 1000.0,
+            "batches_run": self.batches_run,
+            "items_run": self.items_run,
+            "mean_batch_size": (self.items_run / self.batches_run) if self.batches_run else 0.0,
+        }
+
+
+scheduler = InferenceScheduler(classify_batch)
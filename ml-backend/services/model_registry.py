@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import HTTPException
+
+
+# -----------------------------------------------------------
+# MODEL REGISTRY
+# -----------------------------------------------------------
+# Services register how to load their model instead of loading it at
+# import time. On startup every registered loader runs concurrently in the
+# background, followed by a warmup inference, while uvicorn is already
+# accepting connections. Routes ask the registry for their model and get a
+# 503 until it is ready, and /ready only reports success once all are.
+# Models registered with required=False (optional features) still load in
+# the background, but /ready does not wait for them and a failure only
+# affects the routes that use them.
+MODEL_LOAD_WORKERS = int(os.getenv("MODEL_LOAD_WORKERS", "3"))
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], object]] = {}
+        self._warmups: Dict[str, Optional[Callable[[object], None]]] = {}
+        self._models: Dict[str, object] = {}
+        self._status: Dict[str, Dict] = {}
+        self._optional: set = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], object],
+        warmup: Optional[Callable[[object], None]] = None,
+        required: bool = True,
+    ) -> None:
+        self._loaders[name] = loader
+        if not required:
+            self._optional.add(name)
+        self._warmups[name] = warmup
+        self._status.setdefault(name, {"state": "pending"})
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            raise HTTPException(status_code=503, detail=f"Model '{name}' is not ready yet")
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def set(self, name: str, model: object) -> None:
+        """Swap in a model object (used by hot reloads)."""
+        self._models[name] = model
+
+    def _load_one(self, name: str) -> None:
+        with self._lock:
+            if name in self._models or self._status[name]["state"] == "loading":
+                return
+            self._status[name] = {"state": "loading"}
+
+        started = time.perf_counter()
+        try:
+            model = self._loaders[name]()
+            loaded = time.perf_counter()
+            warmup = self._warmups.get(name)
+            if warmup is not None:
+                warmup(model)
+            self._models[name] = model
+            self._status[name] = {
+                "state": "ready",
+                "load_s": round(loaded - started, 3),
+                "warmup_s": round(time.perf_counter() - loaded, 3),
+            }
+            print(f"Model '{name}' ready in {time.perf_counter() - started:.2f}s")
+        except Exception as exc:
+            self._status[name] = {"state": "failed", "error": str(exc)}
+            print(f"Model '{name}' failed to load: {exc}")
+
+    def load_all(self, max_workers: int = MODEL_LOAD_WORKERS, names: Optional[Iterable[str]] = None) -> None:
+        """Load every registered model (or just ``names``) concurrently and block until done."""
+        names = [n for n in (names or self._loaders) if n not in self._models]
+        if not names:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="model-load") as pool:
+            list(pool.map(self._load_one, names))
+
+    def start_background_load(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.load_all, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def is_ready(self) -> bool:
+        return all(name in self._models for name in self._loaders if name not in self._optional)
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            name: {**self._status.get(name, {"state": "pending"}), **({"required": False} if name in self._optional else {})}
+            for name in self._loaders
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# -----------------------------------------------------------
+# CHAT SESSION STORE
+# -----------------------------------------------------------
+# Sessions expire after CHAT_SESSION_TTL_S of inactivity, keep at most
+# CHAT_SESSION_MAX_HISTORY messages, and the least recently used session
+# is evicted once CHAT_SESSION_MAX_COUNT is reached.
+#
+#   memory  per-process dict (default, single worker only)
+#   sqlite  SQLite file in WAL mode, shared by every worker on the host
+SESSION_BACKEND = os.getenv("CHAT_SESSION_BACKEND", "memory").lower()
+SESSION_TTL_S = float(os.getenv("CHAT_SESSION_TTL_S", "3600"))
+SESSION_MAX_HISTORY = int(os.getenv("CHAT_SESSION_MAX_HISTORY", "50"))
+SESSION_MAX_COUNT = int(os.getenv("CHAT_SESSION_MAX_COUNT", "10000"))
+SESSION_DB_PATH = os.getenv(
+    "CHAT_SESSION_DB_PATH", str(Path(__file__).parent.parent / "data" / "chat_sessions.sqlite3")
+)
+
+
+def _trim(session: Dict, max_history: int) -> Dict:
+    history = session.get("history", [])
+    if len(history) > max_history:
+        session["history"] = history[-max_history:]
+    return session
+
+
+def _deep_sizeof(obj) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(v) for v in obj)
+    return size
+
+
+class InMemorySessionStore:
+    backend = "memory"
+
+    def __init__(self, ttl_s: float, max_history: int, max_count: int):
+        self.ttl_s = ttl_s
+        self.max_history = max_history
+        self.max_count = max_count
+        self._data: "OrderedDict[str, tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in last-used order, so expired ones sit at the front.
+        while self._data:
+            session_id, (last_seen, _) = next(iter(self._data.items()))
+            if now - last_seen < self.ttl_s:
+                break
+            del self._data[session_id]
+            self.expired += 1
+
+    def create(self, session_id: str, session: Dict) -> None:
+        self.save(session_id, session)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            self._data[session_id] = (now, entry[1])
+            self._data.move_to_end(session_id)
+            return entry[1]
+
+    def save(self, session_id: str, session: Dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._data[session_id] = (now, _trim(session, self.max_history))
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.max_count:
+                self._data.popitem(last=False)
+                self.evicted += 1
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._data)
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            sessions = [session for _, session in self._data.values()]
+        return _deep_sizeof(sessions)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "active_sessions": len(self),
+            "memory_bytes": self.memory_bytes(),
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttl_s": self.ttl_s,
+            "max_history": self.max_history,
+            "max_sessions": self.max_count,
+        }
+
+
+class SQLiteSessionStore:
+    backend = "sqlite"
+
+    CLEANUP_EVERY_S = 30.0
+
+    def __init__(self, path: str, ttl_s: float, max_history: int, max_count: int):
+        self.ttl_s = ttl_s
+        self.max_history = max_history
+        self.max_count = max_count
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connect()
+        # Each forked worker (gunicorn preload) opens its own connection.
+        os.register_at_fork(after_in_child=self._connect)
+        self._last_cleanup = 0.0
+        self.expired = 0
+        self.evicted = 0
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chat_sessions_last_seen ON chat_sessions (last_seen)")
+        self._lock = threading.Lock()
+
+    def _cleanup(self, now: float) -> None:
+        if now - self._last_cleanup < self.CLEANUP_EVERY_S:
+            return
+        self._last_cleanup = now
+        self.expired += max(0, self._conn.execute(
+            "DELETE FROM chat_sessions WHERE last_seen <= ?", (now - self.ttl_s,)
+        ).rowcount)
+        self.evicted += max(0, self._conn.execute(
+            "DELETE FROM chat_sessions WHERE session_id IN ("
+            "SELECT session_id FROM chat_sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+            (self.max_count,),
+        ).rowcount)
+
+    def create(self, session_id: str, session: Dict) -> None:
+        self.save(session_id, session)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_sessions WHERE session_id = ? AND last_seen > ?",
+                (session_id, now - self.ttl_s),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE chat_sessions SET last_seen = ? WHERE session_id = ?", (now, session_id))
+        return json.loads(row[0])
+
+    def save(self, session_id: str, session: Dict) -> None:
+        now = time.time()
+        data = json.dumps(_trim(session, self.max_history))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, data, last_seen) VALUES (?, ?, ?)",
+                (session_id, data, now),
+            )
+            self._cleanup(now)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chat_sessions WHERE last_seen > ?", (time.time() - self.ttl_s,)
+            ).fetchone()[0]
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "active_sessions": len(self),
+            "memory_bytes": self.memory_bytes(),
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttl_s": self.ttl_s,
+            "max_history": self.max_history,
+            "max_sessions": self.max_count,
+        }
+
+
+def build_session_store():
+    if SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore(SESSION_DB_PATH, SESSION_TTL_S, SESSION_MAX_HISTORY, SESSION_MAX_COUNT)
+    if SESSION_BACKEND == "memory":
+        return InMemorySessionStore(SESSION_TTL_S, SESSION_MAX_HISTORY, SESSION_MAX_COUNT)
+    raise ValueError(f"Unknown CHAT_SESSION_BACKEND '{SESSION_BACKEND}', expected memory or sqlite")
@@ -0,0 +1,115 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.model_registry import registry
+
+
+# -----------------------------------------------------------
+# SPEECH TO TEXT BACKENDS
+# -----------------------------------------------------------
+# /voice/stream transcribes audio on the server while the user is still
+# recording. The backend is picked with STT_BACKEND:
+#
+#   off      voice check-ins are disabled and /voice/stream answers 503
+#            (default)
+#   whisper  faster-whisper running locally on the CPU, model STT_MODEL
+#            (needs `pip install faster-whisper`)
+#   stub     TESTS ONLY: ignores what was said and returns words of
+#            STT_STUB_TEXT, one per STT_STUB_WORD_S seconds of non-silent
+#            audio. Never enable it where real students record.
+#
+# A backend takes 16 kHz mono float32 audio plus the transcript so far (used
+# as context so a sentence split across segments still reads naturally) and
+# returns the text of that audio. It is registered as the optional "stt"
+# model: it loads in the background like the others, but /ready does not
+# wait for it and if it fails to load only /voice/stream returns 503.
+STT_BACKEND = os.getenv("STT_BACKEND", "off").lower()
+STT_MODEL = os.getenv("STT_MODEL", "base.en")
+STT_STUB_TEXT = os.getenv(
+    "STT_STUB_TEXT",
+    "i have been feeling stressed about my exams and i cannot sleep properly at night",
+)
+STT_STUB_WORD_S = float(os.getenv("STT_STUB_WORD_S", "0.5"))
+
+SAMPLE_RATE = 16_000
+SILENCE_RMS = 0.01
+
+
+def frame_rms(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS of consecutive ``frame``-sample frames (a partial last frame is dropped)."""
+    usable = len(audio) - len(audio) % frame
+    if not usable:
+        return np.zeros(0, dtype=np.float32)
+    return np.sqrt(np.mean(np.square(audio[:usable].reshape(-1, frame)), axis=1))
+
+
+class StubTranscriber:
+    name = "stub"
+
+    def __init__(self, text: str = STT_STUB_TEXT, word_s: float = STT_STUB_WORD_S):
+        self.words: List[str] = text.split()
+        self.frame = max(1, int(word_s * SAMPLE_RATE))
+
+    def transcribe(self, audio: np.ndarray, prompt: str = "") -> str:
+        spoken = int(np.count_nonzero(frame_rms(audio, self.frame) > SILENCE_RMS))
+        start = len(prompt.split())
+        return " ".join(self.words[(start + i) % len(self.words)] for i in range(spoken))
+
+
+class WhisperTranscriber:
+    name = "whisper"
+
+    def __init__(self, model_name: str = STT_MODEL):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(model_name, device="cpu", compute_type="int8")
+
+    def transcribe(self, audio: np.ndarray, prompt: str = "") -> str:
+        segments, _ = self.model.transcribe(
+            audio,
+            language="en",
+            beam_size=1,
+            vad_filter=True,
+            initial_prompt=prompt[-200:] or None,
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def load_transcriber():
+    if STT_BACKEND == "stub":
+        print("WARNING: STT_BACKEND=stub returns made-up transcripts; use it for tests only")
+        return StubTranscriber()
+    if STT_BACKEND == "whisper":
+        return WhisperTranscriber()
+    raise ValueError(f"Unknown STT_BACKEND {STT_BACKEND!r} (expected off, whisper or stub)")
+
+
+def warmup_transcriber(transcriber) -> None:
+    transcriber.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+
+if STT_BACKEND != "off":
+    registry.register("stt", load_transcriber, warmup_transcriber, required=False)
+
+
+def require_transcriber():
+    """The loaded backend, or 503 when voice is disabled or not loaded."""
+    if STT_BACKEND == "off":
+        raise HTTPException(status_code=503, detail="Voice check-ins are disabled on this server (STT_BACKEND=off)")
+    return registry.get("stt")
+
+
+def resample(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Linear resampling to 16 kHz; good enough for speech recognition."""
+    if sample_rate == SAMPLE_RATE or not len(audio):
+        return audio
+    target = int(round(len(audio) * SAMPLE_RATE / sample_rate))
+    positions = np.linspace(0, len(audio) - 1, num=target)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def transcribe(audio: np.ndarray, prompt: str = "", transcriber: Optional[object] = None) -> str:
+    return (transcriber or require_transcriber()).transcribe(audio, prompt)
@@ -0,0 +1,52 @@
+from typing import List, Tuple
+import re
+
+import joblib
+import numpy as np
+
+from services.model_registry import registry
+
+
+# -----------------------------------------------------------
+# TF-IDF STRESS MODEL
+# -----------------------------------------------------------
+# Small sparse model (TF-IDF + linear classifier) behind /predict-stress.
+# It is cheap enough to score a text in well under a millisecond, which
+# also makes it the first stage of the emotion cascade (services/cascade.py).
+NON_LETTERS = re.compile(r"[^a-z\s]")
+
+
+def load_stress_model():
+    # Load YOUR model (memory-mapped, so forked workers share the arrays)
+    model = joblib.load("models/stress_model.pkl", mmap_mode="r")
+    vectorizer = joblib.load("models/stress_vectorizer.pkl", mmap_mode="r")
+    return model, vectorizer
+
+
+def warmup_stress_model(loaded):
+    model, vectorizer = loaded
+    model.predict(vectorizer.transform(["warming up the stress model"]))
+
+
+registry.register("stress", load_stress_model, warmup_stress_model)
+
+
+def clean_text(text: str):
+    return NON_LETTERS.sub("", text.lower())
+
+
+def stress_proba(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """``(classes, probabilities)`` for many texts from one sparse matrix."""
+    model, vectorizer = registry.get("stress")
+    return model.classes_, model.predict_proba(vectorizer.transform([clean_text(t) for t in texts]))
+
+
+def score_texts(texts: List[str], probabilities: bool = True):
+    """Stress levels (and class probabilities when the model has them) for
+    many texts from one sparse matrix and one model call."""
+    model, vectorizer = registry.get("stress")
+    if not probabilities or not hasattr(model, "predict_proba"):
+        return [int(p) for p in model.predict(vectorizer.transform([clean_text(t) for t in texts]))], None
+    classes, proba = stress_proba(texts)
+    levels = [int(c) for c in classes[np.argmax(proba, axis=1)]]
+    return levels, [{str(c): round(float(p), 4) for c, p in zip(classes, row)} for row in proba]
@@ -0,0 +1,107 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.chatbot_service import screen_risk
+from services.degradation import degradation
+from services.inference_scheduler import scheduler
+from services.speech_to_text import SAMPLE_RATE, frame_rms, resample, transcribe
+from services.stress_model import score_texts
+
+
+# -----------------------------------------------------------
+# STREAMING VOICE CHECK-INS
+# -----------------------------------------------------------
+# The app sends 16-bit little-endian mono PCM in chunks while recording (a
+# WAV header at the start is skipped). Audio is cut into segments of about
+# STT_SEGMENT_S seconds, at the quietest 100 ms of the last second so words
+# are rarely split, and each segment is transcribed as soon as it is
+# complete. Every new piece of transcript is scored by the stress and
+# emotion models, so when recording stops only the last few seconds are
+# left to transcribe and the final analysis follows almost immediately.
+STT_SEGMENT_S = float(os.getenv("STT_SEGMENT_S", "4"))
+VOICE_MAX_SECONDS = float(os.getenv("VOICE_MAX_SECONDS", "300"))
+
+SPLIT_SEARCH_S = 1.0
+SPLIT_FRAME_S = 0.1
+
+
+class VoiceStream:
+    def __init__(self, sample_rate: int = SAMPLE_RATE, segment_s: float = STT_SEGMENT_S):
+        if not 8_000 <= sample_rate <= 48_000:
+            raise HTTPException(status_code=400, detail="sample_rate must be between 8000 and 48000")
+        self.sample_rate = sample_rate
+        self.segment = int(segment_s * sample_rate)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._carry = b""
+        self._started = False
+        self.samples = 0
+        self.transcript = ""
+
+    @property
+    def duration_s(self) -> float:
+        return self.samples / self.sample_rate
+
+    def feed(self, chunk: bytes) -> List[np.ndarray]:
+        """Add a chunk of PCM and return the segments it completed."""
+
+        if not self._started:
+            self._started = True
+            if chunk[:4] == b"RIFF" and chunk[8:12] == b"WAVE":
+                data = chunk.find(b"data", 12)
+                chunk = chunk[data + 8:] if data >= 0 else b""
+        chunk = self._carry + chunk
+        usable = len(chunk) - len(chunk) % 2
+        self._carry = chunk[usable:]
+        samples = np.frombuffer(chunk[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        self.samples += len(samples)
+        self._buffer = np.concatenate([self._buffer, samples])
+
+        segments = []
+        while len(self._buffer) >= self.segment:
+            cut = self._split_point()
+            segments.append(self._buffer[:cut])
+            self._buffer = self._buffer[cut:]
+        return segments
+
+    def _split_point(self) -> int:
+        frame = int(SPLIT_FRAME_S * self.sample_rate)
+        start = max(0, self.segment - int(SPLIT_SEARCH_S * self.sample_rate))
+        energy = frame_rms(self._buffer[start:self.segment], frame)
+        if not len(energy):
+            return self.segment
+        return start + int(np.argmin(energy)) * frame + frame // 2
+
+    def flush(self) -> Optional[np.ndarray]:
+        """The audio left over once recording has stopped."""
+        rest, self._buffer = self._buffer, np.zeros(0, dtype=np.float32)
+        return rest if len(rest) else None
+
+    def transcribe_segment(self, segment: np.ndarray) -> str:
+        """Transcribe one segment and append it to the transcript; returns the new text."""
+        text = transcribe(resample(segment, self.sample_rate), self.transcript)
+        if text:
+            self.transcript = f"{self.transcript} {text}".strip()
+        return text
+
+
+def analyze_transcript(text: str, key: str) -> Dict:
+    """Stress, emotion and risk for the transcript so far."""
+
+    levels, probabilities = score_texts([text])
+    _, risk = screen_risk(text)
+    if degradation.active():
+        emotion, score = None, None
+    else:
+        result = scheduler.classify(text, key)
+        emotion, score = result["label"], result["score"]
+    return {
+        "transcript": text,
+        "stress_level": levels[0],
+        "stress_probabilities": probabilities[0] if probabilities else None,
+        "emotion": emotion,
+        "emotion_score": score,
+        "risk_level": risk,
+    }
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from services import emotion_service
+from services.emotion_service import PredictRequest, predict
+from services.executor import BoundedExecutor
+
+
+def test_predict_rejects_a_client_over_its_in_flight_limit(monkeypatch):
+    release = threading.Event()
+
+    def slow_classify(text, client_key=""):
+        release.wait(5)
+        return {"label": "joy", "score": 0.9}, "test"
+
+    monkeypatch.setattr(emotion_service, "classify_cascaded", slow_classify)
+    monkeypatch.setattr(emotion_service, "inference_pool", BoundedExecutor(workers=4, queue_limit=4, max_per_client=1))
+
+    async def scenario():
+        first = asyncio.create_task(predict(PredictRequest(text="hello"), "10.0.0.1"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await predict(PredictRequest(text="hello again"), "10.0.0.1")
+        other = asyncio.create_task(predict(PredictRequest(text="hi"), "10.0.0.2"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return rejected.value, await first, await other
+
+    rejected, first, other = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert first.emotion == "joy"
+    assert other.emotion == "joy"
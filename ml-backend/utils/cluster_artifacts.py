@@ -0,0 +1,103 @@
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import joblib
+import numpy as np
+
+from utils.cluster_labels import LABELS
+
+
+# -----------------------------------------------------------
+# VERSIONED CLUSTER ARTIFACTS
+# -----------------------------------------------------------
+# Every retraining run writes models/clusters/vNNNN.joblib and never
+# touches an existing version. models/clusters/CURRENT names the version
+# the server should use; it is replaced atomically, so switching (or
+# rolling back) is a single rename. Without a CURRENT file the original
+# models/model.pkl is served as version "base".
+CLUSTER_DIR = Path(os.getenv("CLUSTER_MODEL_DIR", "models/clusters"))
+CURRENT_FILE = "CURRENT"
+BASE_MODEL_PATH = "models/model.pkl"
+FEATURES = ["stress", "anxiety", "depression"]
+
+
+class ClusterModel(NamedTuple):
+    version: str
+    centroids: np.ndarray
+    labels: Dict[int, str]
+
+
+def list_versions(directory: Path = CLUSTER_DIR) -> List[str]:
+    return sorted(p.stem for p in directory.glob("v[0-9][0-9][0-9][0-9].joblib"))
+
+
+def next_version(directory: Path = CLUSTER_DIR) -> str:
+    versions = list_versions(directory)
+    return f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+
+
+def current_version(directory: Path = CLUSTER_DIR) -> Optional[str]:
+    try:
+        return (directory / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_mtime_ns(directory: Path = CLUSTER_DIR) -> Optional[int]:
+    try:
+        return (directory / CURRENT_FILE).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_artifact(version: str, directory: Path = CLUSTER_DIR) -> Dict:
+    return joblib.load(directory / f"{version}.joblib")
+
+
+def base_artifact() -> Dict:
+    model = joblib.load(BASE_MODEL_PATH, mmap_mode="r")
+    centroids = np.asarray(model.cluster_centers_, dtype=np.float64)
+    return {
+        "version": "base",
+        "model": model,
+        "order": list(range(len(centroids))),
+        "centroids": centroids,
+        "labels": dict(LABELS),
+        "samples_seen": 0,
+        "parent": None,
+    }
+
+
+def write_artifact(artifact: Dict, directory: Path = CLUSTER_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{artifact['version']}.joblib"
+    if path.exists():
+        raise FileExistsError(f"{path} already exists; versions are immutable")
+    tmp = path.with_suffix(".tmp")
+    joblib.dump({**artifact, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def activate(version: str, directory: Path = CLUSTER_DIR) -> None:
+    if version == "base":
+        (directory / CURRENT_FILE).unlink(missing_ok=True)
+        return
+    if not (directory / f"{version}.joblib").exists():
+        raise FileNotFoundError(f"No cluster artifact {version} in {directory}")
+    tmp = directory / (CURRENT_FILE + ".tmp")
+    tmp.write_text(version + "\n")
+    os.replace(tmp, directory / CURRENT_FILE)
+
+
+def load_serving_model(directory: Path = CLUSTER_DIR) -> ClusterModel:
+    """The active version as served: centroids in stable id order plus labels."""
+    version = current_version(directory)
+    artifact = load_artifact(version, directory) if version else base_artifact()
+    return ClusterModel(
+        version=artifact["version"],
+        centroids=np.asarray(artifact["centroids"], dtype=np.float64),
+        labels={int(k): v for k, v in artifact["labels"].items()},
+    )
@@ -0,0 +1,94 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List
+
+
+class KeywordMatcher:
+    """Find every keyword category present in a text with one regex scan.
+
+    All keywords go into one Aho-Corasick automaton (``pyahocorasick``, part
+    of the backend install), which reports every (overlapping) keyword in a
+    single pass over the text. If the package is missing all keywords are
+    compiled into a single trie-shaped regular expression instead; each
+    search reports the longest keyword starting at a position, and the
+    categories of shorter keywords starting there (its prefixes) are folded
+    in ahead of time. That fallback keeps the results identical but is
+    only marginally faster than the plain substring scans.
+
+    Matching is plain substring matching on the lowercased text, exactly
+    like ``any(w in text.lower() for w in keywords)``.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories: Dict[str, List[str]] = {name: [w.lower() for w in words] for name, words in categories.items()}
+
+        owners: Dict[str, set] = {}
+        for name, words in self.categories.items():
+            for word in words:
+                owners.setdefault(word, set()).add(name)
+
+        # Categories of every keyword that is a prefix of (or equal to) each keyword.
+        self._hits: Dict[str, FrozenSet[str]] = {}
+        for word in owners:
+            hit = set()
+            for other, names in owners.items():
+                if word.startswith(other):
+                    hit |= names
+            self._hits[word] = frozenset(hit)
+
+        try:
+            import ahocorasick
+        except ImportError:
+            ahocorasick = None
+
+        if ahocorasick is not None:
+            self.engine = "aho-corasick"
+            self._automaton = ahocorasick.Automaton()
+            for word, names in owners.items():
+                self._automaton.add_word(word, frozenset(names))
+            self._automaton.make_automaton()
+            self.scan = self._scan_automaton
+        else:
+            self.engine = "regex"
+            self._pattern = re.compile(_trie_regex(owners))
+            self.scan = self._scan_regex
+
+    def _scan_automaton(self, text: str) -> FrozenSet[str]:
+        found: set = set()
+        for _, names in self._automaton.iter(text.lower()):
+            found |= names
+        return frozenset(found)
+
+    def _scan_regex(self, text: str) -> FrozenSet[str]:
+        t = text.lower()
+        search = self._pattern.search
+        hits = self._hits
+        found: set = set()
+        match = search(t)
+        while match is not None:
+            found |= hits[match.group()]
+            # Restart one character after the match start, not at its end,
+            # so keywords overlapping this one are still found.
+            match = search(t, match.start() + 1)
+        return frozenset(found)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _node_regex(trie)
+
+
+def _node_regex(node: Dict) -> str:
+    branches = [re.escape(ch) + _node_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A keyword ends here; longer keywords are optional and greedy so the
+        # longest one wins.
+        return "(?:" + body + ")?"
+    return body